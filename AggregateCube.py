@@ -0,0 +1,81 @@
+import pandas as pd
+
+
+class AggregateCube:
+    """
+    Pre-aggregated goal and game tables, built once at load time, so the
+    month_selector callbacks only have to slice and sum a few small rows
+    instead of the raw frames.
+    Access the tables via class.goals, class.games and class.robin_games,
+    the rows of a month selection via the select methods.
+    """
+    goal_keys = ['Name', 'month', 'date']
+    game_keys = ['month', 'Gleichzahl', 'Robin', 'Winner']
+
+    def __init__(self, goals_df, wins_df):
+        """
+
+        :param goals_df: Output of FileMerger.merge_dfs
+        :param wins_df: Output of StatsGetter
+        """
+        self.goals = self.aggregate_goals(goals_df)
+        self.games = self.aggregate_games(wins_df)
+        self.robin_games = wins_df.loc[~wins_df['Robin'].isnull(), :]
+
+    @classmethod
+    def from_tables(cls, goals, games, robin_games):
+        """
+        Cube from already aggregated tables, e.g. ones published by
+        SharedFrames.
+        :return: AggregateCube
+        """
+        cube = cls.__new__(cls)
+        cube.goals, cube.games, cube.robin_games = goals, games, robin_games
+        return cube
+
+    def aggregate_goals(self, _df: pd.DataFrame) -> pd.DataFrame:
+        """
+        One row per player and month.
+        :param _df: Output of FileMerger.merge_dfs
+        :return: DataFrame with Name, month, date and summed Tore
+        """
+        return _df.groupby(self.goal_keys, as_index=False, sort=False,
+                           observed=True)['Tore'].sum()
+
+    def aggregate_games(self, _df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Number of games per month, Gleichzahl, Robin and Winner
+        combination. Missing Gleichzahl/Robin values are kept as their own
+        group, so the isnull based selections keep working on the cube.
+        :param _df: Output of StatsGetter
+        :return: DataFrame with the game keys and summed Games
+        """
+        return _df.groupby(self.game_keys, as_index=False, sort=False,
+                           dropna=False, observed=True)['Games'].sum()
+
+    @staticmethod
+    def _select_months(_df, selected_dates):
+        if 'Overall' in selected_dates:
+            return _df.copy()
+        return _df.loc[_df['month'].isin(selected_dates), :]
+
+    def select_goals(self, selected_dates) -> pd.DataFrame:
+        """
+        :param selected_dates: List of months, 'Overall' selects all
+        :return: Goal rows of the selected months
+        """
+        return self._select_months(self.goals, selected_dates)
+
+    def select_games(self, selected_dates) -> pd.DataFrame:
+        """
+        :param selected_dates: List of months, 'Overall' selects all
+        :return: Game rows of the selected months
+        """
+        return self._select_months(self.games, selected_dates)
+
+    def select_robin_games(self, selected_dates) -> pd.DataFrame:
+        """
+        :param selected_dates: List of months, 'Overall' selects all
+        :return: Robin's trainings in the selected months
+        """
+        return self._select_months(self.robin_games, selected_dates)
@@ -0,0 +1,321 @@
+import os
+import json
+import glob
+import time
+import shutil
+import argparse
+import subprocess
+import sys
+import platform
+import tempfile
+import statistics
+import pandas as pd
+from datetime import datetime
+from FileMerger import FileMerger
+from FileCache import FileCache
+from WinsLosses import StatsGetter
+from SheetManifest import SheetManifest
+from AggregateCube import AggregateCube
+from DataWatcher import DataSnapshot, load_data
+from SyntheticData import write_season, goal_grid
+from SqlStore import SqlStore
+import LegacyPipeline as legacy
+from Visualisation import (backfill_missing_months, get_overall_goals,
+                           build_bar_chart, build_compact_bar_chart,
+                           build_pie_charts)
+
+# players, months, trainings per month
+sizes = {'small': (20, 6, 10),
+         'medium': (40, 24, 12),
+         'large': (80, 60, 15)}
+# Multiples of the shipped workbook's rows the StatsGetter counters are
+# timed at.
+tiles = (1, 10, 100)
+# players x months of the goal grids backfill_missing_months is timed on.
+grids = ('50x36',)
+results_path = os.path.join(os.getcwd(), 'benchmark_results')
+# Median slowdown against the previous run reported as regression.
+regression_ratio = 1.2
+# Run in a fresh interpreter by run_startup, prints the seconds until the
+# first responses of a new worker as JSON.
+startup_script = '''
+import json
+import time
+start = time.perf_counter()
+import Visualisation
+timings = {'import': time.perf_counter() - start}
+
+
+def timed(stage, function):
+    start = time.perf_counter()
+    result = function()
+    timings[stage] = time.perf_counter() - start
+    return result
+
+
+client = timed('create_app',
+               Visualisation.create_app).server.test_client()
+# Dash calls serve_layout for the index already, this loads the data.
+timed('first_index', lambda: client.get('/'))
+timed('first_layout', lambda: client.get('/_dash-layout'))
+version = Visualisation.get_data_watcher().snapshot.version
+response = timed('first_bar_callback', lambda: client.post(
+    '/_dash-update-component', json={
+        'output': 'soccer_bar.figure',
+        'outputs': {'id': 'soccer_bar', 'property': 'figure'},
+        'inputs': [{'id': 'month_selector', 'property': 'value',
+                    'value': 'Overall'},
+                   {'id': 'data_version', 'property': 'data',
+                    'value': version}],
+        'changedPropIds': ['month_selector.value'], 'state': []}))
+assert response.status_code == 200, response.status_code
+print(json.dumps(timings))
+'''
+
+
+def summarize(timings) -> dict:
+    """
+    :param timings: List of seconds
+    :return: Dictionary with min, median and mean seconds
+    """
+    return {'min': min(timings), 'median': statistics.median(timings),
+            'mean': statistics.mean(timings), 'repeat': len(timings)}
+
+
+def measure(function, repeat, setup=None) -> dict:
+    """
+    :param function: Callable without arguments
+    :param repeat: Number of timed calls
+    :param setup: Callable run untimed before every call
+    :return: Dictionary with min, median and mean seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def run_size(players, months, trainings, repeat) -> dict:
+    """
+    Time the ingest, clean, aggregate and figure stages on a synthetic
+    season, reading it through FileMerger/StatsGetter like input_data.
+    :return: Dictionary with the stage as key
+    """
+    season_path = tempfile.mkdtemp(prefix='tsg_season_')
+    input_path, cache = FileMerger.input_path, FileMerger.cache
+    try:
+        write_season(season_path, players, months, trainings)
+        FileMerger.input_path = season_path
+        FileMerger.cache = FileCache(os.path.join(season_path, 'cache'))
+        manifest = SheetManifest(os.path.join(season_path,
+                                              'sheet_manifest.json'))
+
+        def cold():
+            FileMerger.cache.clear()
+            SheetManifest._detected.clear()
+
+        def merge():
+            return FileMerger().merge_dfs()
+
+        def stats():
+            return StatsGetter.from_manifest(manifest, engine='streaming')
+
+        results = {'merge_dfs_cold': measure(merge, repeat, cold),
+                   'stats_getter_cold': measure(stats, repeat, cold),
+                   'merge_dfs_warm': measure(merge, repeat),
+                   'stats_getter_warm': measure(stats, repeat)}
+
+        df, stats_getter = merge(), stats()
+        wins_df = stats_getter.output
+        cube = AggregateCube(df, wins_df)
+        data = DataSnapshot(df=df, wins_df=wins_df, cube=cube,
+                            version='benchmark')
+        store = SqlStore(os.path.join(season_path, 'store.sqlite'))
+        store.ingest(data)
+        store_cube = store.load().cube
+        latest_month = [data.months[-1]]
+        backfilled = backfill_missing_months(cube.goals)
+        results.update({
+            'clean_data': measure(stats_getter.clean_data, repeat),
+            'aggregate': measure(lambda: AggregateCube(df, wins_df), repeat),
+            'backfill': measure(lambda: backfill_missing_months(cube.goals),
+                                repeat),
+            'overall_goals': measure(lambda: get_overall_goals(backfilled),
+                                     repeat),
+            'select_month': measure(lambda: cube.select_goals(latest_month),
+                                    repeat),
+            'store_select_month': measure(
+                lambda: store_cube.select_goals(latest_month), repeat),
+            # px.bar, served with compact_bar_chart = False.
+            'bar_figure': measure(lambda: build_bar_chart(data, ['Overall']),
+                                  repeat),
+            'bar_figure_compact': measure(
+                lambda: build_compact_bar_chart(data, ['Overall']), repeat),
+            'pie_figure': measure(lambda: build_pie_charts(
+                data, ['Overall'], 'Exklusive Robin'), repeat)})
+        results['rows'] = {'df': len(df.index), 'wins_df': len(wins_df.index)}
+        return results
+    finally:
+        FileMerger.input_path, FileMerger.cache = input_path, cache
+        SheetManifest._detected.clear()
+        shutil.rmtree(season_path, ignore_errors=True)
+
+
+def run_tiled(factor, repeat) -> dict:
+    """
+    Time include_month_col and clean_data against the replaced row by row
+    versions on the sheets of the shipped 'Tore und Siege kicken.xlsx'
+    repeated factor times. The row by row versions take seconds at 100x
+    and are timed once.
+    :return: Dictionary with the stage as key
+    """
+    stats = StatsGetter.from_manifest(engine='streaming')
+    sheets = {key: pd.concat([df] * factor, ignore_index=True) for key, df
+              in legacy.raw_sheets(stats).items()}
+
+    def fresh_sheets():
+        stats._dict_of_dfs = {key: df.copy() for key, df in sheets.items()}
+
+    # clean_data works on the tiled sheets the counters were timed on.
+    return {'counters': measure(stats.include_month_col, repeat,
+                                fresh_sheets),
+            'counters_iterrows': measure(
+                lambda: legacy.include_month_col(sheets), 1),
+            'clean_data': measure(stats.clean_data, repeat),
+            'clean_data_apply': measure(
+                lambda: legacy.clean_data(stats.concat_dfs()), 1),
+            'rows': {'wins_df': sum(len(df.index) for df in
+                                    sheets.values())}}
+
+
+def run_grid(players, months, repeat) -> dict:
+    """
+    Time backfill_missing_months against the replaced concat loop on a
+    synthetic goal grid, see SyntheticData.goal_grid. The concat loop is
+    timed once.
+    :return: Dictionary with the stage as key
+    """
+    goals = goal_grid(players, months)
+    backfilled = backfill_missing_months(goals)
+    return {'backfill': measure(lambda: backfill_missing_months(goals),
+                                repeat),
+            'backfill_concat': measure(
+                lambda: legacy.backfill_missing_months(goals), 1),
+            'overall_goals': measure(lambda: get_overall_goals(backfilled),
+                                     repeat),
+            'rows': {'goals': len(goals.index)}}
+
+
+def run_shipped(repeat) -> dict:
+    """
+    Time the bar chart stages on the workbooks in input_data, the
+    production size.
+    :return: Dictionary with the stage as key
+    """
+    cube = load_data(engine='streaming').cube
+    backfilled = backfill_missing_months(cube.goals)
+    return {'backfill': measure(lambda: backfill_missing_months(cube.goals),
+                                repeat),
+            'overall_goals': measure(lambda: get_overall_goals(backfilled),
+                                     repeat),
+            'rows': {'goals': len(cube.goals.index)}}
+
+
+def run_startup(repeat) -> dict:
+    """
+    Time the startup of a new worker on input_data: importing
+    Visualisation, create_app and the first index, layout and bar chart
+    requests, each run in a fresh interpreter. The file cache in ./cache
+    is used as a restarted worker finds it.
+    :return: Dictionary with the stage as key
+    """
+    runs = [json.loads(subprocess.run(
+        [sys.executable, '-c', startup_script], check=True,
+        capture_output=True, text=True).stdout.splitlines()[-1]) for
+        _ in range(repeat)]
+    return {stage: summarize([run[stage] for run in runs]) for stage in
+            runs[0]}
+
+
+def previous_results(output_path):
+    files = sorted(glob.glob(os.path.join(output_path, '*.json')))
+    if not files:
+        return None
+    with open(files[-1], encoding='utf-8') as results_file:
+        return json.load(results_file)
+
+
+def compare(results, previous) -> list:
+    """
+    :return: List of (size, stage, median, previous median, ratio) for
+    every stage of both runs
+    """
+    rows = []
+    for size, stages in results['sizes'].items():
+        before = previous['sizes'].get(size, dict()) if previous else dict()
+        for stage, timing in stages.items():
+            if stage == 'rows':
+                continue
+            old = before.get(stage, {}).get('median')
+            rows.append((size, stage, timing['median'], old,
+                         None if old is None else timing['median'] / old))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Time the dashboard pipeline on synthetic seasons.')
+    parser.add_argument('--sizes', nargs='+', default=list(sizes),
+                        choices=list(sizes))
+    parser.add_argument('--tiles', nargs='*', type=int, default=list(tiles),
+                        help='Multiples of the shipped workbook the '
+                             'StatsGetter counters are timed at')
+    parser.add_argument('--grids', nargs='*', default=list(grids),
+                        help='Goal grids as <players>x<months> the '
+                             'backfill is timed on')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--startup-repeat', type=int, default=3,
+                        help='Fresh interpreters the startup is timed in')
+    parser.add_argument('--output', default=results_path)
+    args = parser.parse_args()
+
+    previous = previous_results(args.output)
+    results = {'created': datetime.now().isoformat(timespec='seconds'),
+               'python': platform.python_version(),
+               'pandas': pd.__version__,
+               'sizes': {size: run_size(*sizes[size], args.repeat) for
+                         size in args.sizes}}
+    results['sizes']['shipped'] = run_shipped(args.repeat)
+    results['sizes']['startup'] = run_startup(args.startup_repeat)
+    results['sizes'].update({f'shipped_x{factor}': run_tiled(factor,
+                                                             args.repeat)
+                             for factor in args.tiles})
+    results['sizes'].update({f'grid_{grid}': run_grid(
+        *map(int, grid.split('x')), args.repeat) for grid in args.grids})
+
+    os.makedirs(args.output, exist_ok=True)
+    output_file = os.path.join(
+        args.output, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output_file, 'w', encoding='utf-8') as results_file:
+        json.dump(results, results_file, indent=2)
+
+    regressions = 0
+    for size, stage, median, old, ratio in compare(results, previous):
+        flag = ''
+        if ratio is not None and ratio > regression_ratio:
+            flag = '  REGRESSION'
+            regressions += 1
+        old_text = ('' if old is None else
+                    f'{old * 1000:10.2f} ms {ratio:5.2f}x')
+        print(f'{size:12} {stage:18} {median * 1000:10.2f} ms '
+              f'{old_text}{flag}')
+    print(f'Results written to {output_file}')
+    return regressions
+
+
+if __name__ == '__main__':
+    raise SystemExit(1 if main() else 0)
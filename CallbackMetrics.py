@@ -0,0 +1,201 @@
+import os
+import time
+import cProfile
+import threading
+import functools
+import numpy as np
+from flask import g, has_request_context
+from datetime import datetime
+from collections import defaultdict, deque
+
+
+class _Stage:
+    __slots__ = ('metrics', 'key', 'start')
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(*self.key, time.perf_counter() - self.start)
+
+
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_no_stage = _NoStage()
+
+
+class CallbackMetrics:
+    """
+    Opt-in latency instrumentation for the Dash callbacks. Every named
+    stage of a callback keeps its last durations in a rolling window,
+    the p50/p95/p99 are served at /metrics in Prometheus text format.
+    Stage 'total' is the callback itself, stage 'request' the complete
+    Dash request including the JSON (de)serialisation of the figures.
+    Callbacks slower than the profile threshold dump their cProfile stats.
+    Until class.enable() is called, stages cost a single attribute check.
+    """
+    quantiles = (0.5, 0.95, 0.99)
+    profile_path = os.path.join(os.getcwd(), 'profiles')
+
+    def __init__(self, window=1024):
+        """
+
+        :param window: Number of durations kept per callback and stage
+        """
+        self.window = window
+        self.enabled = False
+        self.profile_threshold = None
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(int)
+        self._sums = defaultdict(float)
+        self._gauges = dict()
+        self._lock = threading.Lock()
+        # cProfile can only profile one callback at a time, concurrent
+        # callbacks are timed without profiling.
+        self._profile_lock = threading.Lock()
+
+    def enable(self, server=None, profile_threshold=None, profile_path=None):
+        """
+        Start recording and serve the metrics.
+        :param server: Flask server to add the /metrics route to, e.g.
+        app.server
+        :param profile_threshold: Seconds after which a callback's cProfile
+        stats are dumped, None doesn't profile
+        :param profile_path: Directory of the dumped .prof files
+        """
+        self.enabled = True
+        self.profile_threshold = profile_threshold
+        if profile_path is not None:
+            self.profile_path = profile_path
+        if server is not None:
+            server.add_url_rule('/metrics', 'metrics', self._serve_metrics)
+            server.before_request(self._start_request)
+            server.after_request(self._finish_request)
+
+    def observe(self, callback, stage, seconds):
+        key = callback, stage
+        with self._lock:
+            self._samples[key].append(seconds)
+            self._counts[key] += 1
+            self._sums[key] += seconds
+
+    def gauge(self, name, description, read):
+        """
+        Serve a value at /metrics next to the callback stages.
+        :param name: Prometheus metric name
+        :param description: HELP text of the metric
+        :param read: Callable without arguments returning the current value
+        """
+        self._gauges[name] = description, read
+
+    def stage(self, callback, stage):
+        """
+        Context manager timing one stage of a callback.
+        :param callback: Callback name
+        :param stage: Stage name, e.g. 'slice' or 'figure'
+        """
+        if not self.enabled:
+            return _no_stage
+        return _Stage(self, (callback, stage))
+
+    def timed(self, callback):
+        """
+        Decorator recording the complete callback as stage 'total' and
+        profiling it if a profile threshold is set.
+        :param callback: Callback name
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                if has_request_context():
+                    g.tsg_callback = callback
+                profiler = None
+                if (self.profile_threshold is not None and
+                        self._profile_lock.acquire(blocking=False)):
+                    profiler = cProfile.Profile()
+                start = time.perf_counter()
+                try:
+                    if profiler is None:
+                        return function(*args, **kwargs)
+                    return profiler.runcall(function, *args, **kwargs)
+                finally:
+                    seconds = time.perf_counter() - start
+                    self.observe(callback, 'total', seconds)
+                    if profiler is not None:
+                        self._profile_lock.release()
+                        if seconds > self.profile_threshold:
+                            self.dump_profile(profiler, callback, seconds)
+            return wrapper
+        return decorator
+
+    def dump_profile(self, profiler, callback, seconds):
+        os.makedirs(self.profile_path, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        profiler.dump_stats(os.path.join(
+            self.profile_path,
+            f'{callback}-{stamp}-{seconds * 1000:.0f}ms.prof'))
+
+    def summary(self) -> dict:
+        """
+        :return: Dictionary with (callback, stage) as key and the
+        quantiles, count and sum of the durations as value
+        """
+        with self._lock:
+            samples = {key: list(values) for key, values in
+                       self._samples.items()}
+            counts, sums = dict(self._counts), dict(self._sums)
+        return {key: {'quantiles': dict(zip(self.quantiles, np.quantile(
+                          values, self.quantiles).tolist())),
+                      'count': counts[key], 'sum': sums[key]}
+                for key, values in sorted(samples.items())}
+
+    def prometheus_text(self) -> str:
+        name = 'tsg_callback_stage_seconds'
+        lines = [f'# HELP {name} Duration of the named Dash callback stages.',
+                 f'# TYPE {name} summary']
+        for (callback, stage), values in self.summary().items():
+            labels = f'callback="{callback}",stage="{stage}"'
+            for quantile, seconds in values['quantiles'].items():
+                lines.append(f'{name}{{{labels},quantile="{quantile}"}} '
+                             f'{seconds:.6g}')
+            lines.append(f'{name}_sum{{{labels}}} {values["sum"]:.6g}')
+            lines.append(f'{name}_count{{{labels}}} {values["count"]}')
+        for name, (description, read) in self._gauges.items():
+            lines += [f'# HELP {name} {description}',
+                      f'# TYPE {name} gauge',
+                      f'{name} {read():.6g}']
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _start_request():
+        g.tsg_request_start = time.perf_counter()
+
+    def _finish_request(self, response):
+        callback = g.pop('tsg_callback', None)
+        start = g.pop('tsg_request_start', None)
+        if callback is not None and start is not None:
+            self.observe(callback, 'request', time.perf_counter() - start)
+        return response
+
+    def _serve_metrics(self):
+        return self.prometheus_text(), 200, {
+            'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._sums.clear()
@@ -0,0 +1,110 @@
+import logging
+import threading
+import pandas as pd
+from dataclasses import dataclass
+from FileMerger import FileMerger
+from FileCache import FileCache
+from WinsLosses import StatsGetter
+from SheetManifest import SheetManifest
+from AggregateCube import AggregateCube
+
+logger = logging.getLogger(__name__)
+
+
+class StaleSnapshot(Exception):
+    """
+    Raised by a snapshot's cube which reads from a store when the store
+    was updated to another version since the snapshot was loaded.
+    """
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """
+    Immutable set of frames the callbacks work on. A reload builds a new
+    snapshot and swaps it in as a whole, so a callback which grabbed the
+    previous one keeps working on consistent data.
+    Snapshots mapped by SharedFrames hold df and wins_df as read-only
+    pyarrow Tables, snapshots of a SqlStore hold neither. The callbacks
+    only work on the cube.
+    """
+    df: pd.DataFrame
+    wins_df: pd.DataFrame
+    cube: AggregateCube
+    version: str
+
+    @property
+    def months(self):
+        # The cube keeps the months in the order of wins_df.
+        return self.cube.games['month'].unique().tolist()
+
+
+def current_version():
+    manifest = SheetManifest()
+    return FileCache.version_stamp(FileMerger().file_paths +
+                                   [manifest.file_path,
+                                    manifest.manifest_path])
+
+
+def load_data(workers=None, engine=None) -> DataSnapshot:
+    """
+    Build a snapshot from the workbooks in input_data.
+    :param workers: Number of worker processes, see FileMerger
+    :param engine: Engine StatsGetter reads the sheets with
+    :return: DataSnapshot
+    """
+    version = current_version()
+    df = FileMerger(workers=workers).merge_dfs()
+    wins_df = StatsGetter.from_manifest(workers=workers,
+                                        engine=engine).output
+    logger.info('File cache: %d hits, %d misses', FileMerger.cache.hits,
+                FileMerger.cache.misses)
+    return DataSnapshot(df=df, wins_df=wins_df,
+                        cube=AggregateCube(df, wins_df), version=version)
+
+
+class DataWatcher(threading.Thread):
+    """
+    Background thread polling input_data for new or changed workbooks.
+    Access the current data via class.snapshot.
+    """
+
+    def __init__(self, load, current_version, interval=5.0):
+        """
+
+        :param load: Callable returning a fresh DataSnapshot
+        :param current_version: Callable returning the version stamp of
+        the workbooks currently in input_data
+        :param interval: Seconds between two polls
+        """
+        super().__init__(name='DataWatcher', daemon=True)
+        self.load = load
+        self.current_version = current_version
+        self.interval = interval
+        self.snapshot = load()
+        self._stop_event = threading.Event()
+
+    def poll(self):
+        """
+        Reload the data if the workbooks changed since the last snapshot.
+        Only the changed workbooks are parsed, the others are served by
+        FileMerger.cache.
+        :return: True if a new snapshot was swapped in
+        """
+        if self.current_version() == self.snapshot.version:
+            return False
+        self.snapshot = self.load()
+        logger.info('Loaded input data version %s', self.snapshot.version)
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                # Most likely a workbook which is still being written, the
+                # next poll retries with the old snapshot still in place.
+                logger.exception('Reloading input data failed')
+
+    def stop(self):
+        self._stop_event.set()
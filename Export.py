@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import logging
+import argparse
+import plotly.io as pio
+from functools import partial
+from DataWatcher import DataWatcher, load_data, current_version
+from FigureCache import FigureCache
+from Visualisation import build_served_bar_chart, build_pie_charts, title_style
+
+logger = logging.getLogger(__name__)
+
+export_path = os.path.join(os.getcwd(), 'export')
+robin_options = ['Inklusive Robin', 'Exklusive Robin']
+
+page_template = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>TSG Muenster 1b - {title}</title>
+</head>
+<body style="background-color: #004f9a; color: #e7e7e7;
+             font-family: {font_family};">
+<h1 style="text-align: center;">TSG Muenster 1b</h1>
+<p style="text-align: center;">{title}</p>
+{figures}
+</body>
+</html>
+"""
+
+
+def default_selections(data) -> list:
+    """
+    'Overall' and the latest month, the selections nearly every visitor
+    looks at.
+    """
+    selections = [['Overall']]
+    if data.months:
+        selections.append([data.months[-1]])
+    return selections
+
+
+def selection_name(dates, robin) -> str:
+    """
+    File name of an exported selection, e.g.
+    'October-2022_January-2023--exklusive-robin'.
+    """
+    return '_'.join(dates) + '--' + robin.lower().replace(' ', '-')
+
+
+def export_selection(data, dates, robin) -> dict:
+    """
+    The soccer_bar, sub_pie_charts and Robin section outputs of one
+    selection, as the callbacks render them.
+    :return: Dictionary with the component id as key
+    """
+    sub_pie_fig, robin_style, robin_children = build_pie_charts(
+        data, list(dates), robin)
+    robin_figures = {child.id: child.figure for child in robin_children
+                     if getattr(child, 'figure', None) is not None}
+    return {'soccer_bar': build_served_bar_chart(data, list(dates)),
+            'sub_pie_charts': sub_pie_fig,
+            'robin_section': {'style': robin_style,
+                              'robin_pie': robin_figures.get('robin_pie'),
+                              'robin_line': robin_figures.get('robin_line')}}
+
+
+def write_file(path, text):
+    # Written next to the target and swapped in, so the file server never
+    # serves a half written file.
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as out_file:
+        out_file.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_html(path, title, outputs):
+    figures = [outputs['soccer_bar'], outputs['sub_pie_charts']]
+    figures += [fig for fig in (outputs['robin_section']['robin_pie'],
+                                outputs['robin_section']['robin_line'])
+                if fig is not None]
+    # plotly.js is loaded once from the CDN for all figures of the page.
+    divs = [pio.to_html(fig, full_html=False,
+                        include_plotlyjs='cdn' if idx == 0 else False)
+            for idx, fig in enumerate(figures)]
+    write_file(path, page_template.format(
+        title=title, font_family=title_style['title_font_family'],
+        figures='\n'.join(divs)))
+
+
+def export(data, selections=None, output_path=None) -> str:
+    """
+    Render the selections of one data version to
+    <output_path>/<version>/ as JSON and standalone HTML and point
+    <output_path>/latest.json at them. Selections which were already
+    exported for this version are not rendered again.
+    :param data: DataSnapshot
+    :param selections: List of month selections, defaults to
+    default_selections
+    :param output_path: Directory served by the file server
+    :return: Directory of the exported version
+    """
+    output_path = output_path or export_path
+    selections = selections or default_selections(data)
+    version_path = os.path.join(output_path, data.version)
+
+    index_path = os.path.join(version_path, 'index.json')
+    os.makedirs(version_path, exist_ok=True)
+    index = dict()
+    if os.path.exists(index_path):
+        with open(index_path, encoding='utf-8') as index_file:
+            index = json.load(index_file)
+
+    for selection in selections:
+        dates = FigureCache.normalize_dates(selection)
+        for robin in robin_options:
+            name = selection_name(dates, robin)
+            if name in index:
+                continue
+            outputs = export_selection(data, dates, robin)
+            write_file(os.path.join(version_path, f'{name}.json'),
+                       pio.json.to_json_plotly(outputs))
+            write_html(os.path.join(version_path, f'{name}.html'),
+                       f'{list(dates)}, {robin}', outputs)
+            index[name] = {'months': list(dates), 'robin': robin,
+                           'json': f'{data.version}/{name}.json',
+                           'html': f'{data.version}/{name}.html'}
+
+    write_file(index_path, json.dumps(index, indent=2))
+    write_file(os.path.join(output_path, 'latest.json'),
+               json.dumps({'version': data.version, 'selections': index},
+                          indent=2))
+    return version_path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Export the dashboard figures of fixed selections as '
+                    'static JSON and HTML.')
+    parser.add_argument('--selection', action='append', default=None,
+                        help="Comma separated months or 'Overall', can be "
+                             "given several times. Defaults to 'Overall' "
+                             "and the latest month.")
+    parser.add_argument('--output', default=export_path)
+    parser.add_argument('--watch', type=float, default=None,
+                        help='Seconds between two polls of input_data, '
+                             'exports every new data version')
+    args = parser.parse_args()
+    selections = None if args.selection is None else [
+        [month.strip() for month in selection.split(',')] for selection in
+        args.selection]
+
+    watcher = DataWatcher(partial(load_data, engine='streaming'),
+                          current_version)
+    logger.info('Exported %s', export(watcher.snapshot, selections,
+                                      args.output))
+    while args.watch is not None:
+        time.sleep(args.watch)
+        try:
+            if watcher.poll():
+                logger.info('Exported %s', export(watcher.snapshot,
+                                                  selections, args.output))
+        except Exception:
+            logger.exception('Exporting input data failed')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
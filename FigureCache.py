@@ -0,0 +1,101 @@
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+
+class FigureCache:
+    """
+    Bounded LRU cache for the generated callback outputs.
+    Entries are keyed on the callback, the normalized month selection,
+    the Robin selection and the data version the output was built from.
+    A new data version drops all entries built from older data.
+    Access the hit/miss counts via class.hits, class.misses and
+    class.hit_rate, the number of cached outputs via class.size.
+    """
+
+    def __init__(self, maxsize=32):
+        """
+
+        :param maxsize: Number of outputs kept before the least recently
+        used one is evicted
+        """
+        self.maxsize = maxsize
+        self.data_version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def month_order(month):
+        """
+        Sort key putting 'Month-Year' strings in chronological order,
+        anything else after them.
+        :param month: Month as in the month column, e.g. 'October-2022'
+        :return: Tuple of the parsed date and the month
+        """
+        try:
+            return datetime.strptime(month, '%B-%Y'), month
+        except ValueError:
+            return datetime.max, month
+
+    @classmethod
+    def normalize_dates(cls, selected_dates) -> tuple:
+        """
+        Chronologically sorted, deduplicated month selection. Every
+        selection including 'Overall' covers the complete timeline and
+        collapses to it.
+        :param selected_dates: month_selector value, a string or a list
+        :return: Tuple of selected months
+        """
+        if not selected_dates:
+            return tuple()
+        if isinstance(selected_dates, str):
+            selected_dates = [selected_dates]
+        if 'Overall' in selected_dates:
+            return 'Overall',
+        return tuple(sorted(set(selected_dates), key=cls.month_order))
+
+    @property
+    def hit_rate(self):
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    @property
+    def size(self):
+        return len(self._entries)
+
+    def get_or_build(self, key, data_version, build):
+        """
+        Return the cached output for key or build and store it.
+        :param key: Hashable key, see normalize_dates for the month part
+        :param data_version: Version stamp of the data the output is
+        built from
+        :param build: Callable without arguments returning the output
+        :return: Output of build
+        """
+        key = (*key, data_version)
+        with self._lock:
+            if data_version != self.data_version:
+                self._entries.clear()
+                self.data_version = data_version
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        output = build()
+
+        with self._lock:
+            if data_version == self.data_version:
+                self._entries[key] = output
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return output
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits, self.misses = 0, 0
@@ -0,0 +1,196 @@
+import os
+import glob
+import json
+import hashlib
+import tempfile
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from StreamingReader import read_sheet_ranges
+
+
+def _read_excel(requests):
+    # Sheets of one workbook read with engine='streaming' share a single
+    # opened workbook, everything else goes through pd.read_excel.
+    parsed = [None] * len(requests)
+    streamed = dict()
+    for idx, (file_path, read_kwargs) in enumerate(requests):
+        if read_kwargs.get('engine') == 'streaming':
+            streamed.setdefault(file_path, []).append(idx)
+        else:
+            parsed[idx] = pd.read_excel(file_path, **read_kwargs)
+
+    for file_path, indices in streamed.items():
+        dfs = read_sheet_ranges(file_path, [
+            {key: value for key, value in requests[idx][1].items() if
+             key != 'engine'} for idx in indices])
+        for idx, df in zip(indices, dfs):
+            parsed[idx] = df
+    return parsed
+
+
+class FileCache:
+    """
+    Persistent on-disk cache for parsed Excel sheets.
+    Every entry is keyed on the workbook path, the read arguments and the
+    file's mtime + size, so a changed workbook is re-parsed automatically
+    and its outdated entry removed.
+    Entries are stored as Parquet; frames Arrow cannot represent (mixed
+    type object columns) fall back to pickle. The latest frame per sheet
+    is additionally kept in memory, so reloading a directory in which
+    only one workbook changed only parses that workbook.
+    Access the hit/miss counts via class.hits and class.misses.
+    """
+    cache_path = os.path.join(os.getcwd(), 'cache')
+    formats = {'.parquet': (pd.read_parquet, 'to_parquet'),
+               '.pkl': (pd.read_pickle, 'to_pickle')}
+
+    def __init__(self, cache_path=None):
+        if cache_path is not None:
+            self.cache_path = cache_path
+        os.makedirs(self.cache_path, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._frames = dict()
+
+    @staticmethod
+    def file_stamp(file_path):
+        """
+        Identity of a file's current content as (path, mtime, size).
+        :param file_path:
+        :return: Tuple which changes whenever the file is rewritten
+        """
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def version_stamp(cls, file_paths):
+        """
+        Short hash over the stamps of several files.
+        :param file_paths:
+        :return: String which changes whenever one of the files is rewritten
+        """
+        stamps = sorted(cls.file_stamp(x) for x in file_paths)
+        return hashlib.sha1(
+            json.dumps(stamps).encode('utf-8')).hexdigest()[:12]
+
+    def _entry_prefix(self, file_path, read_kwargs):
+        key = json.dumps([os.path.abspath(file_path), read_kwargs],
+                         sort_keys=True, default=str)
+        return os.path.join(self.cache_path,
+                            hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _find_entry(self, entry):
+        for extension in self.formats:
+            if os.path.exists(entry + extension):
+                return entry + extension
+        return None
+
+    def _invalidate(self, prefix, entry):
+        # Several processes may share the cache directory: entries of the
+        # current stamp and other processes' temp files are left alone,
+        # files another process removed first are skipped.
+        current = [entry + extension for extension in self.formats]
+        for stale_file in glob.glob(f'{prefix}-*'):
+            if stale_file in current or stale_file.endswith('.tmp'):
+                continue
+            try:
+                os.remove(stale_file)
+            except FileNotFoundError:
+                pass
+
+    def _store(self, df, entry):
+        for extension, (_, writer) in self.formats.items():
+            # Unique per writer, so concurrent processes never write to or
+            # replace each other's temp file.
+            handle, tmp_file = tempfile.mkstemp(dir=self.cache_path,
+                                                suffix='.tmp')
+            os.close(handle)
+            try:
+                getattr(df, writer)(tmp_file)
+            except (ImportError, TypeError, ValueError):
+                os.remove(tmp_file)
+                continue
+            try:
+                os.replace(tmp_file, entry + extension)
+            except FileNotFoundError:
+                # Removed by clear() in another process, the frame is
+                # parsed again next time.
+                pass
+            return
+
+    def _lookup(self, file_path, read_kwargs, stamp=None):
+        if stamp is None:
+            _, mtime, size = self.file_stamp(file_path)
+            stamp = f'{mtime}-{size}'
+        prefix = self._entry_prefix(file_path, read_kwargs)
+        entry = f'{prefix}-{stamp}'
+
+        cached_entry, df = self._frames.get(prefix, (None, None))
+        if cached_entry != entry:
+            cache_file = self._find_entry(entry)
+            if cache_file is None:
+                return prefix, entry, None
+            reader = self.formats[os.path.splitext(cache_file)[1]][0]
+            df = reader(cache_file)
+            self._frames[prefix] = entry, df
+        self.hits += 1
+        return prefix, entry, df
+
+    def read_excel(self, file_path, **read_kwargs) -> pd.DataFrame:
+        """
+        Drop-in for pd.read_excel which serves unchanged sheets from cache.
+        :param file_path: Path of the workbook
+        :param read_kwargs: Keyword arguments passed on to pd.read_excel.
+        engine='streaming' reads sheet_name, usecols and nrows with
+        StreamingReader.read_sheet_ranges instead.
+        :return: Parsed sheet
+        """
+        return self.read_excel_many([(file_path, read_kwargs)])[0]
+
+    def read_excel_many(self, requests, workers=None, stamps=None) -> list:
+        """
+        Read several sheets, parsing the ones missing from the cache in a
+        process pool if workers is given.
+        :param requests: List of (file_path, read_kwargs) tuples
+        :param workers: Number of processes parsing concurrently, None or 1
+        parses serially. A single missing sheet is always parsed serially.
+        :param stamps: Optional content stamp per request, e.g. from
+        SheetManifest.sheet_fingerprints, used instead of the file's mtime
+        and size. None entries fall back to the file's stamp.
+        :return: List of parsed sheets in the order of requests
+        """
+        if stamps is None:
+            stamps = [None] * len(requests)
+        lookups = [self._lookup(file_path, read_kwargs, stamp) for
+                   (file_path, read_kwargs), stamp in zip(requests, stamps)]
+        missing = [idx for idx, (_, _, df) in enumerate(lookups) if
+                   df is None]
+        self.misses += len(missing)
+
+        if workers is not None and workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers,
+                                                     len(missing))) as pool:
+                parsed = [df for dfs in pool.map(
+                    _read_excel, [[requests[idx]] for idx in missing]) for
+                    df in dfs]
+        else:
+            parsed = _read_excel([requests[idx] for idx in missing])
+
+        for idx, df in zip(missing, parsed):
+            prefix, entry, _ = lookups[idx]
+            self._invalidate(prefix, entry)
+            self._store(df, entry)
+            self._frames[prefix] = entry, df
+            lookups[idx] = prefix, entry, df
+
+        return [df.copy() for _, _, df in lookups]
+
+    def clear(self):
+        for cache_file in glob.glob(os.path.join(self.cache_path, '*')):
+            try:
+                os.remove(cache_file)
+            except FileNotFoundError:
+                pass
+        self._frames.clear()
+        self.hits, self.misses = 0, 0
+
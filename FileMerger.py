@@ -1,49 +1,80 @@
 import os
 import pandas as pd
 from datetime import datetime
+from FileCache import FileCache
 
 
 class FileMerger:
     input_path = os.path.join(os.getcwd(), 'input_data')
+    cache = FileCache()
 
-    def __init__(self):
+    def __init__(self, workers=None):
+        """
+
+        :param workers: Number of processes parsing the workbooks
+        concurrently, None parses them one after another
+        """
+        self.workers = workers
         self.datetime = datetime.now().date()
         self.date_str = datetime.strftime(self.datetime, '%Y-%m')
-        self.file_list = [x for x in os.listdir(self.input_path) if
-                          x.startswith('Kicken') and x.endswith('.xlsx')]
+        self.file_list = sorted(
+            [x for x in os.listdir(self.input_path) if
+             x.startswith('Kicken') and x.endswith('.xlsx')],
+            key=lambda x: datetime.strptime(self.month_year(x), '%B-%Y'))
         self.file_paths = [os.path.join(self.input_path, file) for file in
                            self.file_list]
 
+    @staticmethod
+    def month_year(file):
+        month_white_space = file.find(' ')
+        year_white_space = file.rfind(' ')
+        file_type_white_space = file.find('.xlsx')
+        month = file[month_white_space+1:year_white_space]
+        year = file[year_white_space+1:file_type_white_space]
+        return f'{month}-{year}'
+
     def read_files(self):
-        return [pd.read_excel(x) for x in self.file_paths]
+        return self.cache.read_excel_many(
+            [(x, dict()) for x in self.file_paths], workers=self.workers)
 
     def include_month_col(self):
+        """
+        Add the date and month of each workbook.
+        :return: Dictionary with '<Month>-<Year>' as key, so the same
+        month of different seasons is kept apart
+        """
         dict_with_months = {}
         dfs = self.read_files()
         for file, df in zip(self.file_list, dfs):
-            month_white_space = file.find(' ')
-            year_white_space = file.rfind(' ')
-            file_type_white_space = file.find('.xlsx')
-            month = file[month_white_space+1:year_white_space]
-            year = file[year_white_space+1:file_type_white_space]
-            month_year = f'{month}-{year}'
+            month_year = self.month_year(file)
             df['date'] = datetime.strptime(month_year, '%B-%Y')
             df['month'] = month_year
-            dict_with_months[month] = df
+            dict_with_months[month_year] = df
         return dict_with_months
 
-    def merge_dfs(self):
-        dfs = self.include_month_col()
-        out_df = pd.DataFrame(dict())
-        for idx, items in enumerate(dfs.items()):
-            if idx == 0:
-                out_df = items[1]
-            else:
-                out_df = pd.concat([out_df, items[1]], axis=0,
-                                   ignore_index=True)
-
+    @staticmethod
+    def concat_months(dfs: dict, categorical=('month',)) -> pd.DataFrame:
+        """
+        Concatenate the monthly frames in a single pass.
+        :param dfs: Dictionary with '<Month>-<Year>' as key, in
+        chronological order
+        :param categorical: Columns stored as category, 'month' keeps the
+        chronological order of dfs as category order
+        :return: DataFrame
+        """
+        if not dfs:
+            return pd.DataFrame(dict())
+        out_df = pd.concat(list(dfs.values()), axis=0, ignore_index=True)
+        for column in categorical:
+            out_df[column] = out_df[column].astype(
+                pd.CategoricalDtype(list(dfs)) if column == 'month' else
+                'category')
         return out_df
 
+    def merge_dfs(self):
+        return self.concat_months(self.include_month_col(),
+                                  categorical=('month', 'Name'))
+
 
 if __name__ == '__main__':
     obj = FileMerger()
@@ -0,0 +1,108 @@
+"""
+Row by row implementations which were replaced by vectorized ones. Kept
+as the reference the tests and Benchmarks.py compare against.
+"""
+import numpy as np
+import pandas as pd
+
+counter_columns = ['month', 'AltCounter', 'JungCounter', 'Einheit']
+
+
+def raw_sheets(stats) -> dict:
+    """
+    The parsed sheets of a StatsGetter without the columns
+    include_month_col added to them in place.
+    """
+    return {key: df.drop(columns=counter_columns) for key, df in
+            stats._dict_of_dfs.items()}
+
+
+def include_month_col(dict_of_dfs) -> dict:
+    """
+    StatsGetter.include_month_col before it was vectorized.
+    :param dict_of_dfs: Dictionary with the month as key and the parsed
+    sheet as value, the frames are not changed
+    :return: Dictionary with the month as key and the sheet with month,
+    AltCounter, JungCounter and Einheit as value
+    """
+    dict_of_dfs_with_months = dict()
+    for key, df in dict_of_dfs.items():
+        df = df.copy()
+        df['month'] = key
+        AltCounter, JungCounter, Einheit = 0, 0, 0
+        df['AltCounter'], df['JungCounter'], df['Einheit'] =\
+            [AltCounter] * len(df.index),\
+            [JungCounter] * len(df.index),\
+            [Einheit] * len(df.index)
+
+        for idx, series in df.iterrows():
+            if series['Alt'] == 1:
+                AltCounter += 1
+                series['AltCounter'] = AltCounter
+                series['JungCounter'] = JungCounter
+            elif series['Alt'] == -1:
+                JungCounter += 1
+                series['JungCounter'] = JungCounter
+                series['AltCounter'] = AltCounter
+            else:
+                series['JungCounter'] = JungCounter
+                series['AltCounter'] = AltCounter
+            Einheit += 1
+            series['Einheit'] = Einheit
+            df.loc[idx, :] = series
+        dict_of_dfs_with_months[key] = df
+    return dict_of_dfs_with_months
+
+
+def clean_data(_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    StatsGetter.clean_data with the row-wise apply, Winner as strings.
+    :param _df: Output of StatsGetter.concat_dfs
+    """
+    _df['Games'] = _df.apply(lambda x: 1, axis=1)
+    _df['Winner'] = _df.apply(lambda x: 'Alt' if x['Alt'] == 1 else (
+        'Jung' if x['Alt'] == -1 else 'Unentschieden'), axis=1)
+    return _df
+
+
+def backfill_missing_months(_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Visualisation.backfill_missing_months with one pd.concat per missing
+    player and month. The filled rows have no date.
+    """
+    out_df = _df.copy()
+
+    months = _df['month'].unique()
+    players = _df['Name'].unique()
+
+    cols = _df.columns
+
+    for player in players:
+        played_months = _df.loc[_df['Name'] == player, 'month']
+        if len(played_months) != len(months):
+            missed_months = [missed for missed in months
+                             if missed not in played_months.values]
+            for missed_month in missed_months:
+                fill_df = pd.DataFrame(np.nan, index=[0], columns=cols)
+                fill_df[['Name', 'month', 'Tore']] = \
+                    player, missed_month, 0
+                out_df = pd.concat([out_df, fill_df], axis=0)
+
+    return out_df
+
+
+def prepare_line_df(in_df: pd.DataFrame,
+                    target_agg: str = 'Jung') -> pd.DataFrame:
+    """
+    Visualisation.prepare_line_df with map and apply per row.
+    """
+    assert target_agg in ['Alt', 'Jung', 'Unentschieden']
+    _df = in_df.rename({'Unnamed: 0': 'Date'}, axis=1)
+    _df.sort_values(by='Date', ascending=True, inplace=True, kind='stable')
+    _df['Date'] = _df['Date'].dt.strftime('%d.%m')
+    _df['target_win'] = _df['Winner'].map(
+        lambda x: 1 if x == target_agg else 0)
+    _df['trainings'] = _df['Date'].apply(lambda x: 1)
+    _df['counter'] = np.cumsum(_df['trainings'])
+    _df['Siege'] = np.cumsum(_df['target_win'])
+    return _df
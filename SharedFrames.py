@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import shutil
+import logging
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+from functools import partial
+from AggregateCube import AggregateCube
+from DataWatcher import DataSnapshot, DataWatcher, load_data, current_version
+
+logger = logging.getLogger(__name__)
+
+
+class SharedFrames:
+    """
+    DataSnapshot frames published as uncompressed Feather (Arrow IPC)
+    files, so several Dash worker processes share one copy instead of each
+    loading input_data. A single loader process publishes every new data
+    version into its own directory and then swaps the version counter
+    file. Workers memory-map the files of the current version read-only,
+    the pages are shared through the OS page cache. The cube tables the
+    callbacks read are DataFrames viewing the mapped buffers, so no
+    worker holds a private copy of them.
+    Access the current data via class.load().
+    """
+    shared_path = os.path.join(os.getcwd(), 'shared_data')
+    frames = ('df', 'wins_df', 'goals', 'games', 'robin_games')
+    # Versions kept on disk, so a worker which just read the counter can
+    # still map the previous version.
+    keep_versions = 2
+
+    def __init__(self, shared_path=None):
+        if shared_path is not None:
+            self.shared_path = shared_path
+        self.counter_path = os.path.join(self.shared_path, 'CURRENT')
+
+    def _read_counter(self):
+        try:
+            with open(self.counter_path, encoding='utf-8') as counter_file:
+                return json.load(counter_file)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _version_name(counter):
+        return f"{counter['counter']}-{counter['version']}"
+
+    def current_version(self):
+        """
+        :return: Counter and data version of the published frames, None if
+        nothing was published yet
+        """
+        counter = self._read_counter()
+        return None if counter is None else self._version_name(counter)
+
+    @staticmethod
+    def to_table(_df: pd.DataFrame) -> pa.Table:
+        """
+        Arrow Table of a DataFrame. Object columns mixing types, i.e.
+        stray cells next to the Kicken tables, are stored as strings.
+        Float columns keep NaN as value instead of null, so to_pandas can
+        view their buffer instead of filling a copy with NaN.
+        :param _df:
+        :return: pyarrow Table
+        """
+        try:
+            table = pa.Table.from_pandas(_df)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            mixed = {column: _df[column].map(lambda x: x if pd.isna(x)
+                                             else str(x))
+                     for column in _df.columns if _df[column].dtype == object}
+            table = pa.Table.from_pandas(_df.assign(**mixed))
+
+        for idx, field in enumerate(table.schema):
+            if (pa.types.is_floating(field.type) and field.name in _df and
+                    table.column(idx).null_count):
+                table = table.set_column(idx, field, pa.array(
+                    _df[field.name].to_numpy(), type=field.type,
+                    from_pandas=False))
+        return table
+
+    def publish(self, snapshot: DataSnapshot) -> str:
+        """
+        Write the snapshot's frames and make them the current version.
+        :param snapshot: DataSnapshot built by the loader
+        :return: Published version
+        """
+        counter = self._read_counter()
+        if counter is not None and counter['version'] == snapshot.version:
+            return self._version_name(counter)
+
+        counter = {'counter': 1 if counter is None else counter['counter'] + 1,
+                   'version': snapshot.version}
+        version_path = os.path.join(self.shared_path,
+                                    self._version_name(counter))
+        os.makedirs(version_path, exist_ok=True)
+
+        cube = snapshot.cube
+        for frame, _df in zip(self.frames, (snapshot.df, snapshot.wins_df,
+                                            cube.goals, cube.games,
+                                            cube.robin_games)):
+            # Uncompressed and a single record batch, so every column is
+            # one contiguous buffer in the mapped file.
+            table = self.to_table(_df)
+            feather.write_feather(table,
+                                  os.path.join(version_path, f'{frame}.arrow'),
+                                  compression='uncompressed',
+                                  chunksize=max(table.num_rows, 1))
+
+        tmp_path = f'{self.counter_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as counter_file:
+            json.dump(counter, counter_file)
+        os.replace(tmp_path, self.counter_path)
+
+        self._remove_old(counter['counter'])
+        return self._version_name(counter)
+
+    def _remove_old(self, counter):
+        for name in os.listdir(self.shared_path):
+            path = os.path.join(self.shared_path, name)
+            prefix = name.split('-', 1)[0]
+            if (os.path.isdir(path) and prefix.isdigit() and
+                    int(prefix) <= counter - self.keep_versions):
+                # Still mapped files can't be removed on Windows, they are
+                # retried on the next publish.
+                shutil.rmtree(path, ignore_errors=True)
+
+    def load(self) -> DataSnapshot:
+        """
+        Map the current version's frames read-only. df and wins_df stay
+        pyarrow Tables, the cube tables become read-only DataFrames. Both
+        are backed by the mapped files.
+        :return: DataSnapshot
+        """
+        counter = self._read_counter()
+        if counter is None:
+            raise FileNotFoundError(f'No frames published in '
+                                    f'{self.shared_path}, start the loader '
+                                    f'with "python SharedFrames.py"')
+        version = self._version_name(counter)
+        tables = {frame: feather.read_table(
+            os.path.join(self.shared_path, version, f'{frame}.arrow'),
+            memory_map=True) for frame in self.frames}
+
+        # One block per column, so pandas doesn't consolidate the columns
+        # into a newly allocated block.
+        cube = AggregateCube.from_tables(
+            *(tables[frame].to_pandas(split_blocks=True) for frame in
+              ('goals', 'games', 'robin_games')))
+        return DataSnapshot(df=tables['df'], wins_df=tables['wins_df'],
+                            cube=cube, version=version)
+
+
+def publish_forever(shared_path=None, interval=5.0, workers=None,
+                    engine='streaming'):
+    """
+    Loader process: build the frames once, publish them and republish
+    whenever the workbooks in input_data change.
+    :param shared_path: Directory the workers map the frames from
+    :param interval: Seconds between two polls of input_data
+    :param workers: Number of worker processes, see FileMerger
+    :param engine: Engine StatsGetter reads the sheets with
+    """
+    shared = SharedFrames(shared_path)
+    watcher = DataWatcher(partial(load_data, workers, engine),
+                          current_version, interval=interval)
+    logger.info('Published version %s', shared.publish(watcher.snapshot))
+    while True:
+        time.sleep(interval)
+        try:
+            if watcher.poll():
+                logger.info('Published version %s',
+                            shared.publish(watcher.snapshot))
+        except Exception:
+            logger.exception('Publishing input data failed')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    publish_forever()
@@ -0,0 +1,154 @@
+import os
+import json
+import logging
+import zipfile
+import openpyxl
+from datetime import datetime
+from xml.etree import ElementTree
+from openpyxl.utils import get_column_letter
+from FileMerger import FileMerger
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+logger = logging.getLogger(__name__)
+
+
+def sheet_fingerprints(file_path) -> dict:
+    """
+    CRC32 and size of each worksheet's XML part, read from the zip
+    directory of the workbook without parsing any sheet. Excel keeps the
+    part of an untouched sheet byte-identical on save, so the fingerprint
+    of a month's sheet only changes if that sheet was edited.
+    :param file_path: Path of the .xlsx workbook
+    :return: Dictionary with the sheet name as key
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        relations = ElementTree.fromstring(
+            archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {relation.get('Id'): relation.get('Target') for
+                   relation in relations}
+
+        fingerprints = dict()
+        for sheet in workbook.iter(f'{{{MAIN_NS}}}sheet'):
+            target = targets[sheet.get(f'{{{REL_NS}}}id')]
+            part = target[1:] if target.startswith('/') else f'xl/{target}'
+            info = archive.getinfo(part)
+            fingerprints[sheet.get('name')] = f'{info.CRC}-{info.file_size}'
+    return fingerprints
+
+
+class SheetManifest:
+    """
+    Sheets, columns and end rows StatsGetter reads from the
+    'Tore und Siege' workbook. Sheets listed in the JSON manifest are
+    taken as they are, every other sheet named '<Month>-<Year>' is
+    detected from its header row. Month sheets in another layout are
+    skipped with a warning.
+    Access the resolved sheets via class.resolve().
+    """
+    manifest_path = os.path.join(FileMerger.input_path, 'sheet_manifest.json')
+    header_row = 1
+    required_headers = ('Alt', 'Jung', 'Robin')
+    _detected = dict()
+
+    def __init__(self, manifest_path=None):
+        if manifest_path is not None:
+            self.manifest_path = manifest_path
+        with open(self.manifest_path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        self.file_name = manifest['file_name']
+        self.file_path = os.path.join(FileMerger.input_path, self.file_name)
+        self.sheets = manifest.get('sheets', dict())
+
+    @staticmethod
+    def sheet_month(sheet_name):
+        try:
+            return datetime.strptime(sheet_name, '%B-%Y')
+        except ValueError:
+            return None
+
+    def detect_sheet(self, worksheet) -> dict:
+        """
+        Find the date, Alt, Jung, Gleichzahl and Robin columns in the
+        header row and the last row with a training date in column A.
+        :param worksheet: openpyxl worksheet
+        :return: Dictionary with 'columns' in 'A, B, ..., X' format and
+        'endrow' as expected by StatsGetter
+        :raises ValueError: If a header of required_headers is missing
+        """
+        header = next(worksheet.iter_rows(min_row=self.header_row,
+                                          max_row=self.header_row,
+                                          values_only=True))
+        positions = dict()
+        for idx, value in enumerate(header, start=1):
+            if isinstance(value, str):
+                positions.setdefault(value.strip(), idx)
+        missing = [x for x in self.required_headers if x not in positions]
+        if missing:
+            raise ValueError(f"Sheet '{worksheet.title}' has no "
+                             f"{', '.join(missing)} header in row "
+                             f"{self.header_row}")
+
+        # The Jung result sign sits right next to the Jung goals column
+        # and has no header of its own.
+        columns = {1, positions['Alt'], positions['Jung'] + 1,
+                   positions['Robin']}
+        if 'Gleichzahl' in positions:
+            columns.add(positions['Gleichzahl'])
+
+        endrow = 0
+        for date, in worksheet.iter_rows(min_row=self.header_row + 1,
+                                         max_col=1, values_only=True):
+            if date is None:
+                break
+            endrow += 1
+
+        return {'columns': ', '.join(get_column_letter(x) for x in
+                                     sorted(columns)),
+                'endrow': endrow}
+
+    def resolve(self) -> dict:
+        """
+        Manifest sheets plus detected month sheets in chronological order.
+        Detection results are kept per sheet fingerprint, so unchanged
+        sheets are only inspected and warned about once per process.
+        :return: Dictionary with sheet name as key and 'columns' and
+        'endrow' as value
+        """
+        fingerprints = sheet_fingerprints(self.file_path)
+        sheets = dict(self.sheets)
+
+        keys = {name: (self.file_path, name, fingerprints[name]) for name in
+                fingerprints if name not in sheets and
+                self.sheet_month(name) is not None}
+        undetected = [name for name, key in keys.items() if
+                      key not in self._detected]
+
+        if undetected:
+            workbook = openpyxl.load_workbook(self.file_path, read_only=True)
+            try:
+                for name in undetected:
+                    try:
+                        sheet = self.detect_sheet(workbook[name])
+                    except ValueError as error:
+                        # A single sheet in another layout mustn't block
+                        # loading all the others.
+                        logger.warning('Skipping sheet: %s', error)
+                        sheet = None
+                    self._detected[keys[name]] = sheet
+            finally:
+                workbook.close()
+
+        for name, key in keys.items():
+            if self._detected[key] is not None:
+                sheets[name] = self._detected[key]
+
+        return dict(sorted(sheets.items(), key=lambda x: (
+            self.sheet_month(x[0]) or datetime.max, x[0])))
+
+
+if __name__ == '__main__':
+    for sheet_name, spec in SheetManifest().resolve().items():
+        print(sheet_name, spec)
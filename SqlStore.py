@@ -0,0 +1,332 @@
+import os
+import json
+import time
+import sqlite3
+import pathlib
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from functools import partial, cached_property
+from contextlib import closing
+from AggregateCube import AggregateCube
+from WinsLosses import StatsGetter
+from FigureCache import FigureCache
+from DataWatcher import (DataSnapshot, DataWatcher, StaleSnapshot, load_data,
+                         current_version)
+
+logger = logging.getLogger(__name__)
+
+# Players and months are stored as their category code, dates as
+# microseconds since the epoch, so the query results turn into the
+# categorical and datetime columns without parsing strings.
+schema = [
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)',
+    'CREATE TABLE IF NOT EXISTS months (code INTEGER PRIMARY KEY, '
+    'month TEXT)',
+    'CREATE TABLE IF NOT EXISTS players (code INTEGER PRIMARY KEY, '
+    'Name TEXT)',
+    'CREATE TABLE IF NOT EXISTS goals (Name INTEGER, month INTEGER, '
+    'date INTEGER, Tore INTEGER)',
+    'CREATE TABLE IF NOT EXISTS games (date INTEGER, month INTEGER, '
+    'Gleichzahl REAL, Robin REAL, Winner TEXT, Games INTEGER)',
+    'CREATE INDEX IF NOT EXISTS goals_month_name ON goals (month, Name)',
+    'CREATE INDEX IF NOT EXISTS goals_name ON goals (Name)',
+    'CREATE INDEX IF NOT EXISTS games_month_flags ON games '
+    '(month, Robin, Gleichzahl)',
+    'CREATE INDEX IF NOT EXISTS games_robin ON games (Robin)',
+]
+numeric_columns = {'goals': ['Tore'],
+                   'games': ['Gleichzahl', 'Robin', 'Games']}
+
+
+class StoreCube(AggregateCube):
+    """
+    AggregateCube answering the month selections with aggregate queries
+    against a SqlStore database, so a selection costs as much as the rows
+    it returns and not the whole history. Only the small games cube is
+    read up front, for the month list and the clientside pie charts. The
+    complete goal and Robin tables are read once, on the first 'Overall'
+    selection.
+    The player and month codes are only valid for the version the cube
+    was opened on, every query raises StaleSnapshot once another version
+    was ingested.
+    """
+
+    def __init__(self, store):
+        """
+
+        :param store: SqlStore
+        """
+        self.store = store
+        with closing(store.connect()) as con:
+            # One read transaction, so version and codes belong together.
+            con.execute('BEGIN')
+            self.version = self._version(con)
+            months = [row[0] for row in con.execute(
+                'SELECT month FROM months ORDER BY code')]
+            names = [row[0] for row in con.execute(
+                'SELECT Name FROM players ORDER BY code')]
+            dtypes = json.loads(con.execute(
+                "SELECT value FROM meta WHERE key = 'dtypes'").fetchone()[0])
+        self.month_codes = {month: code for code, month in enumerate(months)}
+        # Same dtypes as the frames FileMerger and StatsGetter build.
+        self.dtypes = {'Name': pd.CategoricalDtype(names),
+                       'month': pd.CategoricalDtype(months),
+                       'Winner': pd.CategoricalDtype(StatsGetter.winners),
+                       'date': 'datetime64[us]', **dtypes}
+        self.games = self._games()
+
+    @cached_property
+    def goals(self):
+        return self._goals()
+
+    @cached_property
+    def robin_games(self):
+        return self._robin_games()
+
+    def _month_filter(self, selected_dates, conditions=()):
+        """
+        :param selected_dates: List of months
+        :param conditions: Further SQL conditions joined with AND
+        :return: WHERE clause and its parameters
+        """
+        params = [self.month_codes[month] for month in selected_dates
+                  if month in self.month_codes]
+        conditions = [*conditions,
+                      f"month IN ({', '.join('?' * len(params))})"]
+        return 'WHERE ' + ' AND '.join(conditions), params
+
+    def _column(self, column, values):
+        dtype = self.dtypes[column]
+        if column in ('Name', 'month'):
+            return pd.Categorical.from_codes(np.array(values, dtype='int64'),
+                                             dtype=dtype)
+        if column == 'date':
+            return np.array([np.iinfo('int64').min if value is None else
+                             value for value in values],
+                            dtype='int64').view(dtype)
+        if column == 'Winner':
+            return pd.Categorical(values, dtype=dtype)
+        return np.array(values, dtype=dtype)
+
+    @staticmethod
+    def _version(con):
+        return con.execute("SELECT value FROM meta "
+                           "WHERE key = 'version'").fetchone()[0]
+
+    def _read(self, query, params) -> pd.DataFrame:
+        with closing(self.store.connect()) as con:
+            # The query sees the rows of the version checked in the same
+            # transaction, not those of an ingest committed in between.
+            con.execute('BEGIN')
+            version = self._version(con)
+            if version != self.version:
+                raise StaleSnapshot(f'{self.store.db_path} holds version '
+                                    f'{version}, not {self.version}')
+            cursor = con.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        values = zip(*rows) if rows else [()] * len(columns)
+        return pd.DataFrame({column: self._column(column, column_values) for
+                             column, column_values in zip(columns, values)})
+
+    def _goals(self, where='', params=()):
+        # Groups in order of their first row, like groupby(sort=False).
+        return self._read(f'SELECT Name, month, date, SUM(Tore) AS Tore '
+                          f'FROM goals {where} GROUP BY Name, month, date '
+                          f'ORDER BY MIN(rowid)', params)
+
+    def _games(self, where='', params=()):
+        return self._read(f'SELECT month, Gleichzahl, Robin, Winner, '
+                          f'SUM(Games) AS Games FROM games {where} '
+                          f'GROUP BY month, Gleichzahl, Robin, Winner '
+                          f'ORDER BY MIN(rowid)', params)
+
+    def _robin_games(self, where='WHERE Robin IS NOT NULL', params=()):
+        return self._read(f'SELECT date, month, Gleichzahl, Robin, Winner, '
+                          f'Games FROM games {where} ORDER BY rowid',
+                          params).rename({'date': 'Unnamed: 0'}, axis=1)
+
+    def select_goals(self, selected_dates) -> pd.DataFrame:
+        if 'Overall' in selected_dates:
+            return self.goals.copy()
+        return self._goals(*self._month_filter(selected_dates))
+
+    def select_games(self, selected_dates) -> pd.DataFrame:
+        if 'Overall' in selected_dates:
+            return self.games.copy()
+        return self._games(*self._month_filter(selected_dates))
+
+    def select_robin_games(self, selected_dates) -> pd.DataFrame:
+        if 'Overall' in selected_dates:
+            return self.robin_games.copy()
+        return self._robin_games(*self._month_filter(
+            selected_dates, ['Robin IS NOT NULL']))
+
+
+class SqlStore:
+    """
+    SQLite database holding the goal and game rows of the workbooks in
+    input_data, indexed on month, player and the Gleichzahl/Robin flags.
+    A single ingest process fills it, the Dash workers only open it
+    read-only and query the month selections, see StoreCube.
+    Access the current data via class.load().
+    """
+    db_path = os.path.join(os.getcwd(), 'tsg_data.sqlite')
+
+    def __init__(self, db_path=None):
+        if db_path is not None:
+            self.db_path = db_path
+
+    def connect(self, read_only=True) -> sqlite3.Connection:
+        if not read_only:
+            # Autocommit, ingest handles its transaction itself.
+            return sqlite3.connect(self.db_path, isolation_level=None)
+        # as_uri escapes '#', '?' and '%' in the path.
+        uri = pathlib.Path(self.db_path).resolve().as_uri()
+        return sqlite3.connect(f'{uri}?mode=ro', uri=True)
+
+    def current_version(self):
+        """
+        :return: Data version of the ingested rows, None if nothing was
+        ingested yet
+        """
+        if not os.path.exists(self.db_path):
+            return None
+        with closing(self.connect()) as con:
+            if con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                           "AND name = 'meta'").fetchone() is None:
+                return None
+            row = con.execute("SELECT value FROM meta "
+                              "WHERE key = 'version'").fetchone()
+        return None if row is None else row[0]
+
+    @staticmethod
+    def _rows(_df: pd.DataFrame) -> list:
+        return _df.astype(object).where(_df.notna(), None).to_numpy().tolist()
+
+    @staticmethod
+    def _codes(series: pd.Series, categories) -> pd.Series:
+        return pd.Series(pd.Index(categories).get_indexer(series),
+                         index=series.index)
+
+    @staticmethod
+    def _microseconds(series: pd.Series) -> pd.Series:
+        microseconds = series.astype('datetime64[us]').astype('int64')
+        return microseconds.astype(object).where(series.notna(), None)
+
+    def ingest(self, snapshot: DataSnapshot) -> str:
+        """
+        Replace the stored rows with the snapshot's in one transaction.
+        Readers keep seeing the previous version until it is committed.
+        :param snapshot: DataSnapshot built by load_data
+        :return: Ingested version
+        """
+        if self.current_version() == snapshot.version:
+            return snapshot.version
+
+        names = list(snapshot.df['Name'].cat.categories)
+        months = sorted(set(snapshot.df['month'].cat.categories) |
+                        set(snapshot.wins_df['month'].cat.categories),
+                        key=FigureCache.month_order)
+        goals = snapshot.df.dropna(subset=AggregateCube.goal_keys)
+        goals = goals.assign(Name=self._codes(goals['Name'], names),
+                             month=self._codes(goals['month'], months),
+                             date=self._microseconds(goals['date']))
+        games = snapshot.wins_df.rename({'Unnamed: 0': 'date'}, axis=1)
+        games = games.assign(month=self._codes(games['month'], months),
+                             Winner=games['Winner'].astype(object),
+                             date=self._microseconds(games['date']))
+        dtypes = {column: str(frame[column].dtype) for frame, table in
+                  ((goals, 'goals'), (games, 'games'))
+                  for column in numeric_columns[table]}
+
+        with closing(self.connect(read_only=False)) as con:
+            # Readers aren't blocked by the writer and vice versa.
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('BEGIN IMMEDIATE')
+            try:
+                for statement in schema:
+                    con.execute(statement)
+                for table in ('meta', 'months', 'players', 'goals', 'games'):
+                    con.execute(f'DELETE FROM {table}')
+                con.executemany('INSERT INTO months VALUES (?, ?)',
+                                enumerate(months))
+                con.executemany('INSERT INTO players VALUES (?, ?)',
+                                enumerate(names))
+                con.executemany('INSERT INTO goals VALUES (?, ?, ?, ?)',
+                                self._rows(goals[['Name', 'month', 'date',
+                                                  'Tore']]))
+                con.executemany('INSERT INTO games VALUES (?, ?, ?, ?, ?, ?)',
+                                self._rows(games[['date', 'month',
+                                                  'Gleichzahl', 'Robin',
+                                                  'Winner', 'Games']]))
+                con.executemany('INSERT INTO meta VALUES (?, ?)',
+                                [('version', snapshot.version),
+                                 ('dtypes', json.dumps(dtypes))])
+                con.execute('ANALYZE')
+                con.execute('COMMIT')
+            except BaseException:
+                con.execute('ROLLBACK')
+                raise
+        return snapshot.version
+
+    def load(self) -> DataSnapshot:
+        """
+        Open the ingested data. Nothing but the games cube is read, df and
+        wins_df stay in the database.
+        :return: DataSnapshot
+        """
+        if self.current_version() is None:
+            raise FileNotFoundError(f'No data ingested into {self.db_path}, '
+                                    f'run "python SqlStore.py"')
+        # The cube's version, an ingest may have committed meanwhile.
+        cube = StoreCube(self)
+        return DataSnapshot(df=None, wins_df=None, cube=cube,
+                            version=cube.version)
+
+
+def ingest_forever(db_path=None, interval=5.0, workers=None,
+                   engine='streaming'):
+    """
+    Ingest process: load input_data once, ingest it and ingest again
+    whenever the workbooks change.
+    :param db_path: Database the workers query
+    :param interval: Seconds between two polls of input_data
+    :param workers: Number of worker processes, see FileMerger
+    :param engine: Engine StatsGetter reads the sheets with
+    """
+    store = SqlStore(db_path)
+    watcher = DataWatcher(partial(load_data, workers, engine),
+                          current_version, interval=interval)
+    logger.info('Ingested version %s', store.ingest(watcher.snapshot))
+    while True:
+        time.sleep(interval)
+        try:
+            if watcher.poll():
+                logger.info('Ingested version %s',
+                            store.ingest(watcher.snapshot))
+        except Exception:
+            logger.exception('Ingesting input data failed')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Load the workbooks in input_data into the SQLite store '
+                    'the dashboard queries.')
+    parser.add_argument('--database', default=SqlStore.db_path)
+    parser.add_argument('--watch', type=float, default=None,
+                        help='Seconds between two polls of input_data, '
+                             'ingests every new data version')
+    args = parser.parse_args()
+    if args.watch is None:
+        logger.info('Ingested version %s', SqlStore(args.database).ingest(
+            load_data(engine='streaming')))
+    else:
+        ingest_forever(args.database, interval=args.watch)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,85 @@
+import openpyxl
+import pandas as pd
+from pandas.io.parsers import TextParser
+from openpyxl.cell.cell import ERROR_CODES
+from openpyxl.utils import column_index_from_string
+
+
+def _convert_cell(value):
+    # Same conversions as pandas' openpyxl reader: empty and error cells
+    # are missing values and integral floats become ints.
+    if value is None or (isinstance(value, str) and value in ERROR_CODES):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _read_range(worksheet, usecols, nrows=None, header_row=1):
+    columns = sorted({column_index_from_string(x.strip()) for x in
+                      usecols.split(',')})
+    first_column = columns[0]
+    offsets = [column - first_column for column in columns]
+    max_row = None if nrows is None else header_row + nrows
+
+    rows = worksheet.iter_rows(min_row=header_row, max_row=max_row,
+                               min_col=first_column, max_col=columns[-1],
+                               values_only=True)
+    header = next(rows, ())
+    data = [[_convert_cell(row[x]) if x < len(row) else '' for x in
+             offsets] for row in rows]
+
+    names = []
+    for column, offset in zip(columns, offsets):
+        name = header[offset] if offset < len(header) else None
+        names.append(f'Unnamed: {column - 1}' if name is None else name)
+
+    # Trailing rows without any value are not part of the sheet's data,
+    # just as in pd.read_excel.
+    while data and all(x == '' for x in data[-1]):
+        data.pop()
+
+    # Same type inference as pd.read_excel, e.g. for formulas returning
+    # numbers as text.
+    return TextParser(data, names=names, header=None).read()
+
+
+def read_sheet_ranges(file_path, requests) -> list:
+    """
+    Stream the requested columns and rows of several sheets through
+    openpyxl's read-only mode, opening the workbook only once. Only the
+    cells of the requested columns are kept, row by row, so memory stays
+    bounded by the workbook's metadata and the result instead of whole
+    sheets.
+    :param file_path: Path of the workbook
+    :param requests: List of dictionaries with the keyword arguments of
+    read_sheet_range
+    :return: List of DataFrames in the order of requests
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True,
+                                      data_only=True, keep_links=False)
+    try:
+        return [_read_range(workbook[request['sheet_name']],
+                            **{key: value for key, value in request.items()
+                               if key != 'sheet_name'})
+                for request in requests]
+    finally:
+        workbook.close()
+
+
+def read_sheet_range(file_path, sheet_name, usecols, nrows=None,
+                     header_row=1) -> pd.DataFrame:
+    """
+    Mirrors pd.read_excel(file_path, sheet_name, usecols=usecols,
+    nrows=nrows) for a header in the first row, see read_sheet_ranges.
+    :param file_path: Path of the workbook
+    :param sheet_name:
+    :param usecols: Columns in 'A, B, ..., X' Format
+    :param nrows: Number of rows below the header, None reads until the
+    last row with a value in one of the requested columns
+    :param header_row: Excel row of the header (1-indexed)
+    :return: DataFrame with one column per requested column
+    """
+    return read_sheet_ranges(file_path, [dict(sheet_name=sheet_name,
+                                              usecols=usecols, nrows=nrows,
+                                              header_row=header_row)])[0]
@@ -0,0 +1,177 @@
+import os
+import json
+import openpyxl
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Real first names, so the generated names sort and hash like real ones.
+first_names = ['Ben', 'Daniel', 'Molli', 'Fabi', 'Nico', 'Alex', 'Tobi',
+               'Crouch', 'Julien', 'Josh', 'Jamie', 'Albert', 'Rafa', 'Niki',
+               'Flo', 'Laurits', 'Petar', 'Domi', 'Soeren', 'Marc', 'Simi',
+               'Christian', 'Moritz', 'Otis']
+
+
+def player_names(players) -> list:
+    names = ['Robin'] + first_names
+    return [names[x % len(names)] + ('' if x < len(names) else
+                                     f' {x // len(names)}')
+            for x in range(players)]
+
+
+def season_months(months, start='October-2022') -> list:
+    first = pd.Period(datetime.strptime(start, '%B-%Y'), freq='M')
+    return [(first + x).to_timestamp().to_pydatetime() for x in range(months)]
+
+
+def simulate_month(rng, month, names, trainings) -> pd.DataFrame:
+    """
+    Random trainings of one month: who played for Alt or Jung, who
+    scored and the final score.
+    :return: DataFrame with one row per training and player
+    """
+    days = np.sort(rng.choice(np.arange(1, month.days_in_month + 1),
+                              size=min(trainings, month.days_in_month),
+                              replace=False))
+    rows = []
+    for day in days:
+        present = rng.random(len(names)) < 0.75
+        team = np.where(rng.random(len(names)) < 0.5, 1, -1)
+        goals = rng.poisson(1.0, len(names))
+        for name, is_present, player_team, player_goals in zip(
+                names, present, team, goals):
+            if is_present:
+                rows.append((datetime(month.year, month.month, int(day)),
+                             name, int(player_team), int(player_goals)))
+    return pd.DataFrame(rows, columns=['date', 'Name', 'team', 'Tore'])
+
+
+def write_month_workbook(path, month_df):
+    """
+    'Kicken <Month> <Year>.xlsx' with the monthly player table FileMerger
+    reads.
+    """
+    score = month_df.groupby(['date', 'team'])['Tore'].sum().unstack(
+        fill_value=0)
+    # 1 if Alt won the training, -1 if Jung won, 0 for a draw
+    winner = np.sign(score.get(1, 0) - score.get(-1, 0))
+    result = month_df['date'].map(winner) * month_df['team']
+    table = month_df.assign(Siege=result == 1, Niederlagen=result == -1
+                            ).groupby('Name', sort=False)[
+        ['Tore', 'Siege', 'Niederlagen']].sum()
+    decided = table['Siege'] + table['Niederlagen']
+    table['Siegquote'] = (table['Siege'] / decided.where(decided > 0)
+                          ).fillna(0)
+    table = table.sort_values(['Siegquote', 'Siege'], ascending=False)
+    table['Platzierung nach Siegen'] = np.arange(1, len(table.index) + 1)
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Tabelle1')
+    worksheet.append(['Name', 'Platzierung nach Siegen', 'Tore',
+                      'Siegquote', 'Siege', 'Niederlagen'])
+    for name, row in table.iterrows():
+        worksheet.append([name, int(row['Platzierung nach Siegen']),
+                          int(row['Tore']), float(row['Siegquote']),
+                          int(row['Siege']), int(row['Niederlagen'])])
+    workbook.save(path)
+
+
+def write_stats_sheet(workbook, sheet_name, month_df, names):
+    """
+    One month sheet of the 'Tore und Siege' workbook in the layout
+    SheetManifest.detect_sheet expects: date, Alt result, Alt goals, Jung
+    goals, Jung result, a team/goals column pair per player and
+    Gleichzahl.
+    """
+    worksheet = workbook.create_sheet(sheet_name)
+    header = [None, 'Alt', None, 'Jung', None]
+    for name in names:
+        header += [name, None]
+    header.append('Gleichzahl')
+    worksheet.append(header)
+
+    for date, training in month_df.groupby('date'):
+        alt = training['team'] == 1
+        alt_goals = int(training.loc[alt, 'Tore'].sum())
+        jung_goals = int(training.loc[~alt, 'Tore'].sum())
+        alt_result = int(np.sign(alt_goals - jung_goals))
+        teams = training.set_index('Name')
+        row = [date, alt_result, alt_goals, jung_goals, -alt_result]
+        for name in names:
+            if name in teams.index:
+                row += [int(teams.at[name, 'team']),
+                        int(teams.at[name, 'Tore']) or None]
+            else:
+                row += [None, None]
+        row.append(int(alt.sum() == (~alt).sum()))
+        worksheet.append(row)
+
+
+def goal_grid(players, months, missing=0.3, seed=0,
+              start='October-2022') -> pd.DataFrame:
+    """
+    Goal rows per player and month like AggregateCube.goals, without
+    writing workbooks. Every player misses a share of the months, so
+    backfill_missing_months has cells to fill.
+    :param players: Number of players
+    :param months: Number of months
+    :param missing: Share of player and month cells without a row
+    :param seed: Seed of the random generator
+    :param start: First month in '%B-%Y' format
+    :return: DataFrame with Name, month, date and Tore
+    """
+    rng = np.random.default_rng(seed)
+    names = player_names(players)
+    dates = season_months(months, start)
+    month_names = [date.strftime('%B-%Y') for date in dates]
+    grid = pd.MultiIndex.from_product([range(months), range(players)])
+    grid = grid[rng.random(len(grid)) >= missing]
+    month_idx, name_idx = grid.get_level_values(0), grid.get_level_values(1)
+    # Same dtypes as FileMerger.merge_dfs and AggregateCube give them.
+    return pd.DataFrame({
+        'Name': pd.Categorical(np.array(names)[name_idx],
+                               categories=sorted(names)),
+        'month': pd.Categorical.from_codes(month_idx, month_names),
+        'date': np.array(dates, dtype='datetime64[us]')[month_idx],
+        'Tore': rng.poisson(3.0, len(grid))})
+
+
+def write_season(output_path, players=20, months=6, trainings=10, seed=0,
+                 start='October-2022') -> str:
+    """
+    Write a synthetic season to output_path in the input_data layout:
+    one 'Kicken <Month> <Year>.xlsx' per month, the multi-sheet
+    'Tore und Siege kicken.xlsx' and a sheet manifest leaving all sheets
+    to auto detection. The first player is always Robin.
+    :param output_path: Directory, e.g. used as FileMerger.input_path
+    :param players: Number of players
+    :param months: Number of months
+    :param trainings: Trainings per month
+    :param seed: Seed of the random generator
+    :param start: First month in '%B-%Y' format
+    :return: output_path
+    """
+    os.makedirs(output_path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    names = player_names(players)
+
+    stats_workbook = openpyxl.Workbook(write_only=True)
+    for month in season_months(months, start):
+        month_df = simulate_month(rng, pd.Timestamp(month), names, trainings)
+        write_month_workbook(os.path.join(
+            output_path, f"Kicken {month.strftime('%B %Y')}.xlsx"), month_df)
+        write_stats_sheet(stats_workbook, month.strftime('%B-%Y'), month_df,
+                          names)
+    stats_workbook.save(os.path.join(output_path,
+                                     'Tore und Siege kicken.xlsx'))
+
+    with open(os.path.join(output_path, 'sheet_manifest.json'), 'w',
+              encoding='utf-8') as manifest_file:
+        json.dump({'file_name': 'Tore und Siege kicken.xlsx', 'sheets': {}},
+                  manifest_file, indent=2)
+    return output_path
+
+
+if __name__ == '__main__':
+    path = write_season(os.path.join(os.getcwd(), 'synthetic_data'))
+    print(sorted(os.listdir(path)))
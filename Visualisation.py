@@ -1,40 +1,60 @@
-from dash import Dash, dash_table, html, dcc, Input, Output
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import os
+import threading
+from functools import partial
+from dash import Dash, dash_table, html, dcc, callback, Input, Output, State
+from dash import clientside_callback, ClientsideFunction
+from dash.exceptions import PreventUpdate
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
+from FigureCache import FigureCache
 from FileMerger import FileMerger
-from WinsLosses import StatsGetter
+from CallbackMetrics import CallbackMetrics
+from DataWatcher import DataWatcher, StaleSnapshot, load_data, current_version
 
-df = FileMerger().merge_dfs()
+try:
+    import diskcache
+    from dash import DiskcacheManager
+except ImportError:
+    # pip install "dash[diskcache]", without it the bar chart is built in
+    # the request thread.
+    diskcache = None
 
 
-def get_overall_goals(_df):
-    overall_sort_order = dict()
-    grouped_df = _df.groupby('Name', as_index=False)['Tore'].sum()
-    grouped_df.sort_values('Tore', ascending=False, inplace=True)
-
-    for num, name in enumerate(grouped_df['Name']):
-        overall_sort_order[name] = num
-
-    _df['goal_sorter'] = _df['Name'].map(overall_sort_order)
-    _df.sort_values(['goal_sorter', 'date'], ascending=[True, True],
-                    inplace=True)
-    _df['total_goals'] = [0] * len(_df.index)
-
-    goal_df = _df.groupby('Name')['Tore'].sum()
-
-    def _calc_overall_goals(name):
-        return goal_df[name]
-
-    for idx, series in _df.iterrows():
-        _df.loc[idx, 'total_goals'] = _calc_overall_goals(series['Name'])
-
-    return _df
+def get_overall_goals(_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add each player's overall goals and rank to the DataFrame and sort it
+    by rank and date, so the stacked BarChart shows the top scorer first.
+    :param _df: DataFrame after backfill_missing_months function
+    :return: New DataFrame with goal_sorter and total_goals columns
+    """
+    # One pass over the player codes gives both the ranks and the totals,
+    # the DataFrame is only built once for the result.
+    if isinstance(_df['Name'].dtype, pd.CategoricalDtype):
+        # Only the players in _df, in category order like groupby.
+        players, codes = np.unique(_df['Name'].array.codes,
+                                   return_inverse=True)
+    else:
+        codes, players = pd.factorize(_df['Name'], sort=True)
+    totals = np.bincount(codes, weights=_df['Tore'].to_numpy(),
+                         minlength=len(players))
+
+    # Descending like Series.sort_values, so tied players keep the order
+    # they had before.
+    order = np.arange(len(players))[::-1][
+        totals[::-1].argsort(kind='quicksort')][::-1]
+    ranks = np.empty(len(players), dtype='int64')
+    ranks[order] = np.arange(len(players))
+    goal_sorter = ranks[codes]
+
+    rows = np.lexsort((_df['date'].to_numpy(), goal_sorter))
+    columns = {column: values.array.take(rows) for column, values in
+               _df.items()}
+    return pd.DataFrame({**columns,
+                         'goal_sorter': goal_sorter[rows],
+                         'total_goals': totals[codes][rows].astype(
+                             _df['Tore'].dtype)},
+                        index=_df.index.take(rows), copy=False)
 
 
 def backfill_missing_months(_df: pd.DataFrame) -> pd.DataFrame:
@@ -43,42 +63,133 @@ def backfill_missing_months(_df: pd.DataFrame) -> pd.DataFrame:
     with zero values, so all included players have the same amount of
     entries within the DataFrame and the auto-sorting of stacked BarChart
     works.
-    :param _df: DataFrame after _slice_months function
+    :param _df: Goal rows of a month selection, see
+    AggregateCube.select_goals
     :return: DataFrame with same amount of rows per player
     """
+    if _df.empty:
+        # Nothing to backfill for an empty month selection.
+        return _df.copy()
 
-    out_df = _df.copy()
-
-    months = _df['month'].unique()
-    players = _df['Name'].unique()
-
-    cols = _df.columns
+    month_dates = _df.drop_duplicates('month').set_index('month')['date']
+    grid = pd.MultiIndex.from_product([_df['Name'].unique(),
+                                       month_dates.index],
+                                      names=['Name', 'month'])
 
-    for player in players:
-        played_months = _df.loc[_df['Name'] == player, 'month']
-        if len(played_months) != len(months):
-            missed_months = [missed for missed in months
-                             if missed not in played_months.values]
-            for missed_month in missed_months:
-                fill_df = pd.DataFrame(np.nan, index=[0], columns=cols)
-                fill_df[['Name', 'month', 'Tore']] = \
-                    player, missed_month, 0
-                out_df = pd.concat([out_df, fill_df], axis=0)
+    out_df = grid.to_frame(index=False).merge(_df, on=['Name', 'month'],
+                                              how='left')
+    out_df['Tore'] = out_df['Tore'].fillna(0).astype(_df['Tore'].dtype)
+    out_df['date'] = out_df['month'].map(month_dates).astype(
+        month_dates.dtype)
 
     return out_df
 
 
-wins_df = StatsGetter(file_name='Tore und Siege kicken.xlsx',
-                      list_of_sheets=['October-2022', 'November-2022',
-                                      'December-2022', 'January-2023',
-                                      'February-2023'],
-                      list_of_columns=[*['A, B, E, AF'], *['A, B, E, AR, AF'],
-                                       *['A, B, E, AR, AF'],
-                                       *['A, B, E, AR, AF'],
-                                       *['A, B, E, AT, AF']],
-                      list_of_endrows=[11, 8, 9, 9, 10]).output
+load_workers = None
+load_engine = 'streaming'
+# Seconds between two data version checks of an open page. Independent of
+# how often the worker polls input_data, every check is a request.
+client_refresh_interval = 30.0
+# Directory a SharedFrames loader publishes to. If set, the workers map
+# the published frames instead of loading input_data themselves.
+# Set it or store_path, e.g. via create_app, not both.
+shared_data_path = None
+# SQLite database filled by 'python SqlStore.py'. If set, the workers
+# query the month selections from it instead of loading input_data.
+store_path = None
+# Build the bar chart from the player x month matrix instead of px.bar,
+# see build_compact_bar_chart.
+compact_bar_chart = True
+# Results and progress of the background callbacks. Not below cache/,
+# FileCache.clear removes every file in there.
+background_cache_path = os.path.join(os.getcwd(), 'background_cache')
+# Seconds a background result is kept for other visitors.
+background_expire = 24 * 3600
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+figure_cache = FigureCache(maxsize=32)
+metrics = CallbackMetrics()
+# Counts of the workbooks loaded in this process, the loader's in the
+# shared and store modes are logged by load_data.
+metrics.gauge('tsg_file_cache_hits', 'Sheets served by the file cache.',
+              lambda: FileMerger.cache.hits)
+metrics.gauge('tsg_file_cache_misses', 'Sheets parsed from the workbooks.',
+              lambda: FileMerger.cache.misses)
+metrics.gauge('tsg_figure_cache_hits', 'Outputs served by the figure cache.',
+              lambda: figure_cache.hits)
+metrics.gauge('tsg_figure_cache_misses', 'Outputs built by the callbacks.',
+              lambda: figure_cache.misses)
+metrics.gauge('tsg_figure_cache_size', 'Outputs held by the figure cache.',
+              lambda: figure_cache.size)
+metrics.gauge('tsg_figure_cache_maxsize',
+              'Outputs the figure cache holds before evicting.',
+              lambda: figure_cache.maxsize)
+_background_manager = None
+
+
+def get_data_watcher() -> DataWatcher:
+    """
+    Load the data and start watching input_data on first use, once per
+    process, so importing this module and creating the app stay cheap.
+    :return: Running DataWatcher
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _select_data_source()
+            if store_path is not None:
+                from SqlStore import SqlStore
+                store = SqlStore(store_path)
+                _watcher = DataWatcher(store.load, store.current_version,
+                                       interval=1.0)
+            elif shared_data_path is None:
+                _watcher = DataWatcher(partial(load_data, load_workers,
+                                               load_engine), current_version)
+            else:
+                from SharedFrames import SharedFrames
+                shared = SharedFrames(shared_data_path)
+                _watcher = DataWatcher(shared.load, shared.current_version,
+                                       interval=1.0)
+            _watcher.start()
+    return _watcher
+
+
+def _select_data_source(store=None, shared_data=None):
+    """
+    Replace store_path and shared_data_path if one of them is given,
+    otherwise keep the module level setting.
+    :raises ValueError: If both are set
+    """
+    global store_path, shared_data_path
+    if store is None and shared_data is None:
+        store, shared_data = store_path, shared_data_path
+    if store is not None and shared_data is not None:
+        raise ValueError('Set either store_path or shared_data_path, '
+                         'not both')
+    store_path, shared_data_path = store, shared_data
 
-app = Dash(__name__)
+
+def get_background_manager():
+    """
+    DiskcacheManager running the background callbacks in their own
+    process, created on first use.
+    :return: DiskcacheManager, None without diskcache
+    """
+    global _background_manager
+    if diskcache is None:
+        return None
+    with _watcher_lock:
+        if _background_manager is None:
+            # Results are kept per data version, so a selection which
+            # was already built is answered from the cache on the first
+            # poll.
+            _background_manager = DiskcacheManager(
+                diskcache.Cache(background_cache_path),
+                cache_by=[lambda: get_data_watcher().snapshot.version],
+                expire=background_expire)
+    return _background_manager
 
 
 title_style = {'title_font_family': 'Simplifica, Arial, sans-serif',
@@ -91,6 +202,8 @@ plot_style = {'grey': '#DCDCDC',
               'blue': '#004f9a',
               'white': '#e7e7e7'
               }
+progress_shown = {'display': 'block', 'width': '100%'}
+progress_hidden = {'display': 'none'}
 
 
 def update_layout(fig):
@@ -101,7 +214,32 @@ def update_layout(fig):
         **title_style)
 
 
-app.layout = html.Div(className='background-blue',
+def build_robin_section(robin_fig=None, robin_line_fig=None) -> list:
+    robin_happy = html.Img(id='robin_happy',
+                           className='flex-robin-images',
+                           src=r'assets/images/robin_happy.jpeg',
+                           alt='image'
+                           )
+
+    robin_pie = dcc.Graph(id='robin_pie',
+                          className='flex-robin-graph',
+                          figure=robin_fig
+                          )
+
+    robin_line = dcc.Graph(id='robin_line',
+                           className='flex-robin-graph',
+                           figure=robin_line_fig)
+
+    robin_sick = html.Img(id='robin_sick',
+                          className='flex-robin-images',
+                          src=r'assets/images/robin_sick.jpeg', alt='image'
+                          )
+
+    return [robin_happy, robin_pie, robin_line, robin_sick]
+
+
+def build_layout(months, version, refresh_interval, pie_data=None):
+    layout = html.Div(className='background-blue',
                       children=[
                         html.Div(className='flexbox flex-center '
                                            'flex-space-between',
@@ -134,13 +272,19 @@ app.layout = html.Div(className='background-blue',
                                          className='white-font center-text'),
                                   dcc.Dropdown(id='month_selector',
                                                className='center-text',
-                                               options=['Overall'] + wins_df[
-                                                  'month'].unique().tolist(),
+                                               options=['Overall'] +
+                                               months,
                                                value='Overall',
                                                multi=True
                                                ),
                                   ]
                                  ),
+                        dcc.Interval(id='data_refresh',
+                                     interval=refresh_interval * 1000),
+                        dcc.Store(id='data_version', data=version),
+                        dcc.Store(id='pie_data', data=pie_data),
+                        html.Progress(id='bar_progress', value='0',
+                                      max='100', style=progress_hidden),
                         dcc.Graph('soccer_bar'),
                         html.Br(),
                         dcc.RadioItems(id='robin_selector',
@@ -151,18 +295,74 @@ app.layout = html.Div(className='background-blue',
                                        value='Inklusive Robin'),
                         dcc.Graph('sub_pie_charts'),
 
-                        html.Div(id='robin_section')
+                        html.Div(id='robin_section',
+                                 style={'display': 'none'},
+                                 children=build_robin_section())
                       ]
                       )
-
-
-def _slice_months(_df, selected_dates):
-    sliced_df = _df.copy()
-    if 'Overall' in selected_dates:
-        sliced_df = sliced_df
+    return layout
+
+
+def serve_layout():
+    watcher = get_data_watcher()
+    data = watcher.snapshot
+    try:
+        pie_data = client_pie_data(data)
+    except StaleSnapshot:
+        # The store was ingested again since the watcher's last poll.
+        watcher.poll()
+        data = watcher.snapshot
+        pie_data = client_pie_data(data)
+    return build_layout(data.months, data.version, client_refresh_interval,
+                        pie_data)
+
+
+def create_app(instrument=False, profile_threshold=None,
+               background=False, figure_cache_size=32, store_path=None,
+               shared_data_path=None) -> Dash:
+    """
+    Application factory, e.g. for gunicorn 'Visualisation:create_app()'
+    or 'Visualisation:create_app(store_path="tsg_data.sqlite")'.
+    The data is loaded with the first page request, not here.
+    :param instrument: Time the callback stages and serve them at /metrics
+    :param profile_threshold: Seconds after which a callback's cProfile
+    stats are dumped to ./profiles, only used with instrument
+    :param background: Build the bar chart in a background process, see
+    update_bar_charts_background. Needs diskcache
+    :param figure_cache_size: Number of outputs kept in figure_cache
+    :param store_path: SQLite database filled by 'python SqlStore.py' the
+    month selections are queried from
+    :param shared_data_path: Directory the frames published by
+    'python SharedFrames.py' are mapped from
+    :return: Dash app
+    """
+    _select_data_source(store_path, shared_data_path)
+    figure_cache.maxsize = figure_cache_size
+    app = Dash(__name__)
+    # Callbacks are validated against this data-free layout, otherwise
+    # Dash would call serve_layout and load the data right away.
+    app.validation_layout = build_layout([], None, 0)
+    app.layout = serve_layout
+    if instrument:
+        metrics.enable(app.server, profile_threshold=profile_threshold)
+
+    manager = get_background_manager() if background else None
+    if background and manager is None:
+        raise ImportError('Background callbacks need diskcache, '
+                          'pip install "dash[diskcache]"')
+    if not background:
+        app.callback(*bar_chart_dependencies)(update_bar_charts)
     else:
-        sliced_df = sliced_df.loc[sliced_df['month'].isin(selected_dates), :]
-    return sliced_df
+        # A changed selection while a job runs makes the browser cancel
+        # the old job, so only the latest selection is computed.
+        app.callback(*bar_chart_dependencies, background=True,
+                     manager=manager, interval=250,
+                     progress=Output('bar_progress', 'value'),
+                     progress_default='0',
+                     running=[(Output('bar_progress', 'style'),
+                               progress_shown, progress_hidden)]
+                     )(update_bar_charts_background)
+    return app
 
 
 def separate_robin(_df):
@@ -179,34 +379,222 @@ def separate_robin(_df):
     return no_robin_df, robin_df
 
 
-@app.callback(
-    Output('soccer_bar', 'figure'),
-    Input('month_selector', 'value')
+def _report_progress(progress, percent):
+    if progress is not None:
+        progress(str(percent))
+
+
+def build_bar_chart(data, selected_dates, progress=None):
+    # Deferred, plotly.express is only needed once a figure is built.
+    import plotly.express as px
+
+    with metrics.stage('update_bar_charts', 'slice'):
+        bar_df = data.cube.select_goals(selected_dates)
+    _report_progress(progress, 20)
+    with metrics.stage('update_bar_charts', 'backfill'):
+        bar_df = backfill_missing_months(bar_df)
+    _report_progress(progress, 40)
+    with metrics.stage('update_bar_charts', 'overall_goals'):
+        bar_df = get_overall_goals(bar_df)
+    _report_progress(progress, 60)
+    with metrics.stage('update_bar_charts', 'figure'):
+        fig_goals = px.bar(bar_df, x='Name', y='Tore', color='month',
+                           barmode='stack', text_auto=True,
+                           hover_data=['Name', 'month', 'Tore',
+                                       'total_goals'],
+                           title=f'Goals {selected_dates}',
+                           labels={'month': 'Monat',
+                                   'total_goals': 'Gesamttore'},
+                           )
+        update_layout(fig_goals)
+    _report_progress(progress, 80)
+    with metrics.stage('update_bar_charts', 'to_dict'):
+        return fig_goals.to_dict()
+
+
+def build_compact_bar_chart(data, selected_dates, progress=None):
+    """
+    Same chart as build_bar_chart, built from the player x month goal
+    matrix with one go.Bar per month. All numbers go out as typed arrays,
+    the month is taken from the trace name instead of a per-bar
+    customdata string and no backfilled frame is built.
+    :return: Figure dictionary
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
+
+    with metrics.stage('update_bar_charts', 'slice'):
+        goals = data.cube.select_goals(selected_dates)
+    _report_progress(progress, 25)
+    with metrics.stage('update_bar_charts', 'pivot'):
+        month_dates = goals.drop_duplicates('month').set_index('month')[
+            'date'].sort_values()
+        matrix = goals.pivot_table(index='Name', columns='month',
+                                   values='Tore', aggfunc='sum',
+                                   fill_value=0, observed=True)
+        # Same ranking as get_overall_goals, top scorer first.
+        totals = matrix.sum(axis=1).sort_values(ascending=False)
+        matrix = matrix.loc[totals.index, month_dates.index]
+    _report_progress(progress, 50)
+    with metrics.stage('update_bar_charts', 'figure'):
+        names = [str(name) for name in matrix.index]
+        fig_goals = go.Figure(layout=go.Layout(
+            barmode='stack', title_text=f'Goals {selected_dates}',
+            legend=dict(title_text='Monat', tracegroupgap=0),
+            xaxis_title_text='Name', yaxis_title_text='Tore'))
+        for idx, month in enumerate(matrix.columns):
+            fig_goals.add_trace(go.Bar(
+                x=names, y=matrix[month].to_numpy(), name=str(month),
+                legendgroup=str(month), customdata=totals.to_numpy(),
+                marker_color=qualitative.Plotly[
+                    idx % len(qualitative.Plotly)],
+                texttemplate='%{y}', textposition='auto',
+                hovertemplate='Monat=%{fullData.name}<br>Name=%{x}<br>'
+                              'Tore=%{y}<br>Gesamttore=%{customdata}'
+                              '<extra></extra>'))
+        update_layout(fig_goals)
+    _report_progress(progress, 75)
+    with metrics.stage('update_bar_charts', 'to_dict'):
+        return fig_goals.to_dict()
+
+
+@callback(
+    Output('month_selector', 'options'),
+    Output('data_version', 'data'),
+    Output('pie_data', 'data'),
+    Input('data_refresh', 'n_intervals'),
+    State('data_version', 'data')
 )
-def update_bar_charts(selected_dates):
-    bar_df = _slice_months(df, selected_dates)
-    bar_df = backfill_missing_months(bar_df)
-    bar_df = get_overall_goals(bar_df)
-    fig_goals = px.bar(bar_df, x='Name', y='Tore', color='month',
-                       barmode='stack', text_auto=True,
-                       hover_data=['Name', 'month', 'Tore', 'total_goals'],
-                       title=f'Goals {selected_dates}',
-                       labels={'month': 'Monat',
-                               'total_goals': 'Gesamttore'},
-                       )
-    update_layout(fig_goals)
-    return fig_goals
-
-
-@app.callback(
+@metrics.timed('refresh_month_options')
+def refresh_month_options(n_intervals, shown_version):
+    data = get_data_watcher().snapshot
+    if data.version == shown_version:
+        raise PreventUpdate
+    try:
+        with metrics.stage('refresh_month_options', 'pie_data'):
+            pie_data = client_pie_data(data)
+    except StaleSnapshot:
+        # The store was ingested again, the next refresh gets the new data.
+        raise PreventUpdate
+    return ['Overall'] + data.months, data.version, pie_data
+
+
+# Registered by create_app, either in the request thread or as background
+# callback.
+bar_chart_dependencies = [Output('soccer_bar', 'figure'),
+                          Input('month_selector', 'value'),
+                          Input('data_version', 'data')]
+
+
+def build_served_bar_chart(data, selected_dates, progress=None):
+    """
+    The bar chart update_bar_charts serves, see compact_bar_chart.
+    :return: Figure dictionary
+    """
+    build = build_compact_bar_chart if compact_bar_chart else build_bar_chart
+    return build(data, selected_dates, progress)
+
+
+@metrics.timed('update_bar_charts')
+def update_bar_charts(selected_dates, shown_version=None, progress=None):
+    watcher = get_data_watcher()
+    dates = figure_cache.normalize_dates(selected_dates)
+
+    def get_or_build(data):
+        return figure_cache.get_or_build(('bar', dates), data.version,
+                                         lambda: build_served_bar_chart(
+                                             data, list(dates), progress))
+
+    try:
+        return get_or_build(watcher.snapshot)
+    except StaleSnapshot:
+        # The store was ingested again since the watcher's last poll.
+        watcher.poll()
+        return get_or_build(watcher.snapshot)
+
+
+def update_bar_charts_background(set_progress, selected_dates,
+                                 shown_version=None):
+    """
+    update_bar_charts in a process of the background manager, the request
+    thread only starts the job and polls for its result.
+    :param set_progress: Sets bar_progress, percent as string
+    """
+    return update_bar_charts(selected_dates, shown_version, set_progress)
+
+
+# Month and Robin selections are applied in the browser, see
+# assets/pieCharts.js. Only a data refresh goes through the server.
+clientside_callback(
+    ClientsideFunction(namespace='tsg', function_name='pie_charts'),
     Output('sub_pie_charts', 'figure'),
     Output('robin_section', 'style'),
-    Output('robin_section', 'children'),
+    Output('robin_pie', 'figure'),
+    Output('robin_line', 'figure'),
     Input('month_selector', 'value'),
-    Input('robin_selector', 'value')
+    Input('robin_selector', 'value'),
+    Input('pie_data', 'data')
 )
-def update_pie_charts(selected_dates, robin):
-    pie_df = _slice_months(wins_df, selected_dates)
+
+
+def client_pie_data(data) -> dict:
+    """
+    Everything the clientside pie_charts callback needs: the games cube,
+    Robin's trainings sorted by date and the pie figures without values,
+    built by build_pie_charts. Built once per data version.
+    :param data: DataSnapshot
+    :return: JSON serializable dictionary for the pie_data store
+    """
+    def build():
+        import json
+        import plotly.io as pio
+
+        sub_pie, robin_section_style, robin_section = build_pie_charts(
+            data, [], 'Exklusive Robin')
+        figures = {name: json.loads(pio.to_json(fig)) for name, fig in
+                   [('sub_pie', sub_pie),
+                    ('robin_pie', robin_section[1].figure),
+                    ('robin_line', robin_section[2].figure)]}
+        # All figures share the default template, it's only shipped once.
+        template = [fig['layout'].pop('template') for fig in
+                    figures.values()][0]
+
+        games = data.cube.games
+        robin_games = prepare_line_df(data.cube.robin_games)
+        return {'months': sorted(data.months, key=figure_cache.month_order),
+                'games': games.astype(object).where(games.notna(),
+                                                    None).to_dict('list'),
+                'robin_games': robin_games[['month', 'Date', 'Winner']
+                                           ].to_dict('list'),
+                'figures': figures,
+                'template': template,
+                'robin_section_style': robin_section_style}
+
+    return figure_cache.get_or_build(('pie_data',), data.version, build)
+
+
+def prepare_line_df(in_df: pd.DataFrame,
+                    target_agg: str = 'Jung') -> pd.DataFrame:
+    assert target_agg in ['Alt', 'Jung', 'Unentschieden']
+    _df = in_df.rename({'Unnamed: 0': 'Date'}, axis=1)
+    # Stable, so trainings on the same day keep their order whether the
+    # months are sliced before or after sorting.
+    _df.sort_values(by='Date', ascending=True, inplace=True, kind='stable')
+    _df['Date'] = _df['Date'].dt.strftime('%d.%m')
+    _df['target_win'] = (_df['Winner'] == target_agg).astype(int)
+    _df['trainings'] = 1
+    _df['counter'] = np.arange(1, len(_df.index) + 1)
+    _df['Siege'] = _df['target_win'].cumsum()
+
+    return _df
+
+
+def build_pie_charts(data, selected_dates, robin):
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    pie_df = data.cube.select_games(selected_dates)
     no_robin_df, robin_df = separate_robin(pie_df)
     robin_pie = go.Figure(data=go.Pie(values=[1, 2, 3], labels=['1', '2',
                                                                 '3']
@@ -231,22 +619,11 @@ def update_pie_charts(selected_dates, robin):
             return True
         return False
 
-    def prepare_line_df(in_df: pd.DataFrame, target_agg: str) -> pd.DataFrame:
-        assert target_agg in ['Alt', 'Jung', 'Unentschieden']
-        _df = in_df.rename({'Unnamed: 0': 'Date'}, axis=1)
-        _df.sort_values(by='Date', ascending=True, inplace=True)
-        _df['Date'] = _df['Date'].dt.strftime('%d.%m')
-        _df['target_win'] = _df['Winner'].map(
-            lambda x: 1 if x == target_agg else 0)
-        _df['trainings'] = _df['Date'].apply(lambda x: 1)
-        _df['counter'] = np.cumsum(_df['trainings'])
-        _df['Siege'] = np.cumsum(_df['target_win'])
-
-        return _df
-
     if without_robin():
         pie_df = no_robin_df
-        robin_df = prepare_line_df(in_df=robin_df, target_agg='Jung')
+        robin_line_df = prepare_line_df(
+            in_df=data.cube.select_robin_games(selected_dates),
+            target_agg='Jung')
 
         robin_section_style = {'display': 'flex',
                                'alignItems': 'center',
@@ -269,7 +646,7 @@ def update_pie_charts(selected_dates, robin):
 
         robin_line_fig = go.Figure(
             data=px.line(
-                robin_df,
+                robin_line_df,
                 x='Date',
                 y='Siege',
                 markers=True
@@ -285,7 +662,7 @@ def update_pie_charts(selected_dates, robin):
             showgrid=False
         )
         robin_line_fig.update_yaxes(
-            range=[0, len(robin_df.index)],
+            range=[0, len(robin_line_df.index)],
             showgrid=False
         )
         robin_line_fig.update_traces(
@@ -294,33 +671,11 @@ def update_pie_charts(selected_dates, robin):
 
         update_layout(robin_line_fig)
 
-        robin_happy = html.Img(id='robin_happy',
-                               className='flex-robin-images',
-                               src=r'assets/images/robin_happy.jpeg',
-                               alt='image'
-                               )
-
-        robin_pie = dcc.Graph(id='robin_pie',
-                              className='flex-robin-graph',
-                              figure=robin_fig
-                              )
-
-        robin_line = dcc.Graph(id='robin_line',
-                              className='flex-robin-graph',
-                              figure=robin_line_fig)
-
-        robin_sick = html.Img(id='robin_sick',
-                              className='flex-robin-images',
-                              src=r'assets/images/robin_sick.jpeg', alt='image'
-                              )
-
-        robin_section_children.append(robin_happy)
-        robin_section_children.append(robin_pie)
-        robin_section_children.append(robin_line)
-        robin_section_children.append(robin_sick)
+        robin_section_children = build_robin_section(robin_fig,
+                                                     robin_line_fig)
 
-    overall_games = pie_df.shape[0]
-    na_games = len(pie_df['Gleichzahl'].isnull())
+    overall_games = pie_df['Games'].sum()
+    na_games = pie_df.loc[pie_df['Gleichzahl'].isnull(), 'Games'].sum()
     not_na = pie_df.loc[~pie_df['Gleichzahl'].isnull(), :]
     equal_df = not_na.loc[equal_players_selector(), :]
     unequal_df = not_na.loc[~equal_players_selector(), :]
@@ -360,7 +715,7 @@ def update_pie_charts(selected_dates, robin):
     sub_pie_fig.update_layout(title_text=f'Win and Loss Distribution, '
                                          f'Dates: {selected_dates}')
 
-    return sub_pie_fig, robin_section_style, robin_section_children
+    return sub_pie_fig.to_dict(), robin_section_style, robin_section_children
 
     # fig_wins = px.pie(pie_df, values='Games', names='Winner', title=
     #                   f'Overall Win and Loss Distribution, '
@@ -377,4 +732,4 @@ def update_pie_charts(selected_dates, robin):
 
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
@@ -1,7 +1,9 @@
 import os
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 from FileMerger import FileMerger
+from SheetManifest import SheetManifest, sheet_fingerprints
 
 
 @dataclass
@@ -10,12 +12,13 @@ class StatsGetter(FileMerger):
     Class to draw Wins and Losses for Alt vs. Jung Fußball Stats.
     Access the desired output via class.output getter.
     """
-    file: pd.ExcelFile
+    file_path: str
     _dict_of_dfs: dict
     _dict_of_dfs_with_months: dict
+    winners = ['Alt', 'Jung', 'Unentschieden']
 
     def __init__(self, file_name, list_of_sheets, list_of_columns,
-                 list_of_endrows):
+                 list_of_endrows, workers=None, engine=None):
         """
 
         :param file_name:
@@ -23,18 +26,46 @@ class StatsGetter(FileMerger):
         :param list_of_columns: List of desired columns in 'A, B, ...,
         X' Format. Last column should be the 'Robin' column!
         :param list_of_endrows: Excel Row -1 (0-indexed)
+        :param workers: Number of processes parsing the sheets
+        concurrently, None parses them one after another
+        :param engine: None for pd.read_excel, 'streaming' to read only
+        the requested cells row by row, see StreamingReader
         """
-        self.file = pd.ExcelFile(os.path.join(self.input_path, file_name))
-        self._dict_of_dfs = {sheet: pd.read_excel(self.file,
-                                                  sheet_name=sheet,
-                                                  usecols=cols,
-                                                  nrows=end_row) for
-                                 sheet, cols, end_row in zip(
-                list_of_sheets, list_of_columns, list_of_endrows)}
+        self.workers = workers
+        self.file_path = os.path.join(self.input_path, file_name)
+        fingerprints = sheet_fingerprints(self.file_path)
+        engine_kwargs = dict() if engine is None else dict(engine=engine)
+        dfs = self.cache.read_excel_many(
+            [(self.file_path, dict(sheet_name=sheet, usecols=cols,
+                                   nrows=end_row, **engine_kwargs)) for
+             sheet, cols, end_row in zip(list_of_sheets, list_of_columns,
+                                         list_of_endrows)],
+            workers=self.workers,
+            stamps=[fingerprints.get(sheet) for sheet in list_of_sheets])
+        self._dict_of_dfs = dict(zip(list_of_sheets, dfs))
         self._dict_of_dfs_with_months = dict()
         self.include_month_col()
         self._output = self.clean_data()
 
+    @classmethod
+    def from_manifest(cls, manifest=None, workers=None, engine=None):
+        """
+        Read the sheets listed in or detected by the sheet manifest.
+        :param manifest: SheetManifest, defaults to
+        input_data/sheet_manifest.json
+        :param workers: See __init__
+        :param engine: See __init__
+        :return: StatsGetter
+        """
+        if manifest is None:
+            manifest = SheetManifest()
+        sheets = manifest.resolve()
+        return cls(file_name=manifest.file_name,
+                   list_of_sheets=list(sheets),
+                   list_of_columns=[x['columns'] for x in sheets.values()],
+                   list_of_endrows=[x['endrow'] for x in sheets.values()],
+                   workers=workers, engine=engine)
+
     @property
     def output(self):
         return self._output
@@ -44,59 +75,32 @@ class StatsGetter(FileMerger):
         self._output = value
 
     def include_month_col(self):
+        """
+        Add the month and the running Alt wins, Jung wins and training
+        counters of each sheet. Every sheet holds exactly one month, so the
+        counters are cumulative sums over the sheet's rows.
+        """
         for key, df in self._dict_of_dfs.items():
             df['month'] = key
-            AltCounter, JungCounter, Einheit = 0, 0, 0
-            df['AltCounter'], df['JungCounter'], df['Einheit'] =\
-                [AltCounter] * len(df.index),\
-                [JungCounter] * len(df.index),\
-                [Einheit] * len(df.index)
-
-            for idx, series in df.iterrows():
-                if series['Alt'] == 1:
-                    AltCounter += 1
-                    series['AltCounter'] = AltCounter
-                    series['JungCounter'] = JungCounter
-                elif series['Alt'] == -1:
-                    JungCounter += 1
-                    series['JungCounter'] = JungCounter
-                    series['AltCounter'] = AltCounter
-                else:
-                    series['JungCounter'] = JungCounter
-                    series['AltCounter'] = AltCounter
-                Einheit += 1
-                series['Einheit'] = Einheit
-                df.loc[idx, :] = series
+            df['AltCounter'] = (df['Alt'] == 1).cumsum()
+            df['JungCounter'] = (df['Alt'] == -1).cumsum()
+            df['Einheit'] = np.arange(1, len(df.index) + 1)
             self._dict_of_dfs_with_months[key] = df
 
     def concat_dfs(self) -> pd.DataFrame:
-        out_df = pd.DataFrame(dict())
-        for idx, items in enumerate(self._dict_of_dfs_with_months.items()):
-            if idx == 0:
-                out_df = items[1]
-            else:
-                out_df = pd.concat([out_df, items[1]], axis=0,
-                                   ignore_index=True)
-        return out_df
+        return self.concat_months(self._dict_of_dfs_with_months)
 
     def clean_data(self):
         _df = self.concat_dfs()
-        _df['Games'] = _df.apply(lambda x: 1, axis=1)
-        _df['Winner'] = _df.apply(lambda x: 'Alt' if x['Alt'] == 1 else (
-            'Jung' if x['Alt'] == -1 else 'Unentschieden'), axis=1)
+        _df['Games'] = 1
+        _df['Winner'] = pd.Categorical(
+            np.select([_df['Alt'] == 1, _df['Alt'] == -1], self.winners[:2],
+                      default=self.winners[2]), categories=self.winners)
         return _df
 
 
 if __name__ == '__main__':
-    obj = StatsGetter(file_name='Tore und Siege kicken.xlsx',
-                      list_of_sheets=['October-2022', 'November-2022',
-                                      'December-2022', 'January-2023',
-                                      'February-2023'],
-                      list_of_columns=[*['A, B, E, AF'], *['A, B, E, AR, AF'],
-                                       *['A, B, E, AR, AF'],
-                                       *['A, B, E, AR, AF'],
-                                       *['A, B, E, AT, AF']],
-                      list_of_endrows=[11, 8, 9, 9, 10])
+    obj = StatsGetter.from_manifest()
     df = obj.output
 
     print('test')
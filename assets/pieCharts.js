@@ -0,0 +1,122 @@
+// Clientside version of Visualisation.build_pie_charts. The month and Robin
+// selections only filter the small games table shipped in the pie_data
+// store, so toggling them needs no request to the server.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    tsg: {
+        pie_charts: function(selectedDates, robin, pieData) {
+            if (!pieData) {
+                return window.dash_clientside.no_update;
+            }
+            var legendColors = {'Alt': '#636EFA', 'Jung': '#EF553B',
+                                'Unentschieden': '#00CC96'};
+            var dates = normalizeDates(selectedDates, pieData.months);
+            var overall = dates.indexOf('Overall') !== -1;
+
+            function selectRows(table, keep) {
+                var rows = [];
+                for (var i = 0; i < table.month.length; i++) {
+                    if ((overall || dates.indexOf(table.month[i]) !== -1) &&
+                            keep(table, i)) {
+                        rows.push(i);
+                    }
+                }
+                return rows;
+            }
+
+            function pieValues(trace, rows) {
+                var games = pieData.games;
+                trace.values = rows.map(function(i) { return games.Games[i]; });
+                trace.labels = rows.map(function(i) { return games.Winner[i]; });
+                trace.marker = Object.assign({}, trace.marker, {
+                    colors: trace.labels.map(function(x) {
+                        return legendColors[x];
+                    })
+                });
+                return trace;
+            }
+
+            function figure(name) {
+                var fig = JSON.parse(JSON.stringify(pieData.figures[name]));
+                fig.layout.template = pieData.template;
+                return fig;
+            }
+
+            var withoutRobin = robin === 'Exklusive Robin';
+            var pieRows = selectRows(pieData.games, function(table, i) {
+                return !withoutRobin || table.Robin[i] === null;
+            });
+            var games = pieData.games;
+            var equalRows = pieRows.filter(function(i) {
+                return games.Gleichzahl[i] === 1;
+            });
+            var unequalRows = pieRows.filter(function(i) {
+                return games.Gleichzahl[i] !== null && games.Gleichzahl[i] !== 1;
+            });
+
+            var subPieFig = figure('sub_pie');
+            pieValues(subPieFig.data[0], pieRows);
+            pieValues(subPieFig.data[1], equalRows);
+            pieValues(subPieFig.data[2], unequalRows);
+            subPieFig.layout.title = Object.assign({}, subPieFig.layout.title, {
+                text: 'Win and Loss Distribution, Dates: ' + pythonRepr(dates)
+            });
+
+            if (!withoutRobin) {
+                return [subPieFig, {'display': 'none'},
+                        window.dash_clientside.no_update,
+                        window.dash_clientside.no_update];
+            }
+
+            var robinPieFig = figure('robin_pie');
+            pieValues(robinPieFig.data[0], selectRows(games, function(table, i) {
+                return table.Robin[i] !== null;
+            }));
+
+            // robin_games is sorted by date already, the line counts the
+            // Jung wins of the trainings Robin took part in.
+            var robinGames = pieData.robin_games;
+            var lineRows = selectRows(robinGames, function() { return true; });
+            var wins = 0;
+            var robinLineFig = figure('robin_line');
+            robinLineFig.data[0].x = lineRows.map(function(i) {
+                return robinGames.Date[i];
+            });
+            robinLineFig.data[0].y = lineRows.map(function(i) {
+                wins += robinGames.Winner[i] === 'Jung' ? 1 : 0;
+                return wins;
+            });
+            robinLineFig.layout.yaxis = Object.assign(
+                {}, robinLineFig.layout.yaxis, {range: [0, lineRows.length]});
+
+            return [subPieFig, pieData.robin_section_style, robinPieFig,
+                    robinLineFig];
+        }
+    }
+});
+
+// Same selection as FigureCache.normalize_dates.
+function normalizeDates(selectedDates, months) {
+    if (!selectedDates || selectedDates.length === 0) {
+        return [];
+    }
+    if (typeof selectedDates === 'string') {
+        selectedDates = [selectedDates];
+    }
+    if (selectedDates.indexOf('Overall') !== -1) {
+        return ['Overall'];
+    }
+    var unique = selectedDates.filter(function(x, i) {
+        return selectedDates.indexOf(x) === i;
+    });
+    return unique.sort(function(a, b) {
+        var orderA = months.indexOf(a) === -1 ? months.length : months.indexOf(a);
+        var orderB = months.indexOf(b) === -1 ? months.length : months.indexOf(b);
+        return orderA - orderB || (a < b ? -1 : a > b ? 1 : 0);
+    });
+}
+
+// Title text as the Python f-string renders the list of months.
+function pythonRepr(dates) {
+    return '[' + dates.map(function(x) { return "'" + x + "'"; }).join(', ') +
+        ']';
+}
@@ -0,0 +1,24 @@
+import os
+import sys
+import pytest
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_path)
+
+
+@pytest.fixture
+def shipped_stats(monkeypatch, tmp_path):
+    """
+    StatsGetter over the shipped 'Tore und Siege kicken.xlsx', parsed into
+    an empty cache so no cached frame of another version is used.
+    """
+    from FileCache import FileCache
+    from FileMerger import FileMerger
+    from SheetManifest import SheetManifest
+    from WinsLosses import StatsGetter
+
+    input_path = os.path.join(root_path, 'input_data')
+    monkeypatch.setattr(FileMerger, 'input_path', input_path)
+    monkeypatch.setattr(FileMerger, 'cache', FileCache(str(tmp_path)))
+    return StatsGetter.from_manifest(SheetManifest(
+        os.path.join(input_path, 'sheet_manifest.json')))
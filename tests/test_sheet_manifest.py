@@ -0,0 +1,34 @@
+import os
+import json
+import logging
+import openpyxl
+
+
+def test_sheet_without_headers_is_skipped(monkeypatch, tmp_path, caplog):
+    from FileMerger import FileMerger
+    from SheetManifest import SheetManifest
+
+    workbook = openpyxl.Workbook()
+    workbook.active.title = 'January-2023'
+    workbook.active.append([None, 'Alt', None, 'Jung', None, 'Robin',
+                            'Gleichzahl'])
+    workbook.active.append(['2023-01-05', 1, 3, 2, -1, 1, 1])
+    other_layout = workbook.create_sheet('February-2023')
+    other_layout.append(['Datum', 'Sieger', 'Tore'])
+    workbook.save(os.path.join(tmp_path, 'stats.xlsx'))
+    manifest_path = os.path.join(tmp_path, 'sheet_manifest.json')
+    with open(manifest_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump({'file_name': 'stats.xlsx', 'sheets': {}}, manifest_file)
+    monkeypatch.setattr(FileMerger, 'input_path', str(tmp_path))
+    monkeypatch.setattr(SheetManifest, '_detected', dict())
+
+    with caplog.at_level(logging.WARNING, logger='SheetManifest'):
+        sheets = SheetManifest(manifest_path).resolve()
+        assert sheets == {'January-2023': {'columns': 'A, B, E, F, G',
+                                           'endrow': 1}}
+        assert "'February-2023' has no Alt, Jung, Robin header" in \
+            caplog.text
+
+        caplog.clear()
+        assert SheetManifest(manifest_path).resolve() == sheets
+        assert caplog.text == ''
@@ -0,0 +1,52 @@
+import pytest
+import pandas as pd
+import LegacyPipeline as legacy
+
+
+@pytest.fixture
+def shipped_goals(shipped_stats):
+    from FileMerger import FileMerger
+    from AggregateCube import AggregateCube
+
+    return AggregateCube(FileMerger().merge_dfs(), shipped_stats.output).goals
+
+
+def ranked_rows(_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Name, month and Tore in the order the stacked BarChart draws them:
+    players by overall rank, their months in chronological order.
+    """
+    from Visualisation import get_overall_goals
+
+    months = list(_df['month'].dropna().unique())
+    # The concat loop leaves an object date column with NaN fills.
+    _df = get_overall_goals(_df.astype({'Name': str, 'month': str,
+                                        'date': 'datetime64[us]',
+                                        'Tore': int}))
+    _df = _df.assign(month_order=_df['month'].map(months.index))
+    return _df.sort_values(['goal_sorter', 'month_order'], kind='stable')[
+        ['Name', 'month', 'Tore']].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('selected_dates', [
+    ['Overall'], ['January-2023'], ['October-2022', 'February-2023']])
+def test_backfill_matches_concat_loop(shipped_goals, selected_dates):
+    from AggregateCube import AggregateCube
+    from Visualisation import backfill_missing_months
+
+    goals = AggregateCube._select_months(shipped_goals, selected_dates)
+    pd.testing.assert_frame_equal(
+        ranked_rows(backfill_missing_months(goals)),
+        ranked_rows(legacy.backfill_missing_months(goals)))
+
+
+def test_backfill_matches_concat_loop_on_sparse_grid():
+    from SyntheticData import goal_grid
+    from Visualisation import backfill_missing_months
+
+    goals = goal_grid(12, 8, missing=0.4)
+    backfilled = backfill_missing_months(goals)
+    assert len(backfilled.index) == 12 * 8
+    pd.testing.assert_frame_equal(
+        ranked_rows(backfilled),
+        ranked_rows(legacy.backfill_missing_months(goals)))
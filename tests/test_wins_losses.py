@@ -0,0 +1,31 @@
+import pytest
+import pandas as pd
+import LegacyPipeline as legacy
+
+
+def test_include_month_col_matches_iterrows_loop(shipped_stats):
+    expected = legacy.include_month_col(legacy.raw_sheets(shipped_stats))
+    assert list(expected) == list(shipped_stats._dict_of_dfs_with_months)
+    for key, df in shipped_stats._dict_of_dfs_with_months.items():
+        pd.testing.assert_frame_equal(df, expected[key])
+
+
+def test_clean_data_matches_row_wise_apply(shipped_stats):
+    expected = legacy.clean_data(shipped_stats.concat_dfs())
+    # Winner is categorical now, the reference holds plain strings.
+    pd.testing.assert_frame_equal(
+        shipped_stats.output.astype({'Winner': str}),
+        expected.astype({'Winner': str}))
+
+
+@pytest.mark.parametrize('target_agg', ['Alt', 'Jung', 'Unentschieden'])
+def test_prepare_line_df_matches_row_wise_apply(shipped_stats, target_agg):
+    from Visualisation import prepare_line_df
+
+    wins_df = shipped_stats.output
+    robin_games = wins_df.loc[~wins_df['Robin'].isnull(), :]
+    expected = legacy.prepare_line_df(
+        robin_games.astype({'Winner': str}), target_agg)
+    pd.testing.assert_frame_equal(
+        prepare_line_df(robin_games, target_agg).astype({'Winner': str}),
+        expected)